@@ -393,7 +393,11 @@ async def websocket_endpoint(websocket: WebSocket, room_id: str):
         await signaling_manager.connect(websocket, client_id, room_id)
         
         while True:
-            data = await websocket.receive_json()
+            # Accept both text and binary JSON frames
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            data = json.loads(message.get("text") or message["bytes"])
             message_type = data.get("type")
             
             if message_type in ["offer", "answer", "ice_candidate"]:
@@ -24,7 +24,7 @@ class FocusedBackendTester:
         self.session = None
         
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        self.session = aiohttp.ClientSession(raise_for_status=True)
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
@@ -54,13 +54,12 @@ class FocusedBackendTester:
         logger.info("Testing API Root...")
         try:
             async with self.session.get(f"{API_BASE}/") as response:
-                if response.status == 200:
-                    data = await response.json()
-                    logger.info(f"✓ API Root: {data}")
-                    results["api_root"] = True
-                else:
-                    logger.error(f"✗ API Root failed: {response.status}")
-                    results["api_root"] = False
+                data = await response.json()
+                logger.info(f"✓ API Root: {data}")
+                results["api_root"] = True
+        except aiohttp.ClientResponseError as e:
+            logger.error("✗ API Root failed: %s %s %s", e.request_info.url, e.status, e.message)
+            results["api_root"] = False
         except Exception as e:
             logger.error(f"✗ API Root error: {e}")
             results["api_root"] = False
@@ -82,25 +81,22 @@ class FocusedBackendTester:
                 headers={"Content-Type": "application/json"}
             ) as response:
                 end_time = time.time()
+                data = await response.json()
+                inference_time = (end_time - start_time) * 1000
+                
+                logger.info(f"✓ Object Detection successful")
+                logger.info(f"  - Response time: {inference_time:.2f}ms")
+                logger.info(f"  - Detections found: {len(data['detections'])}")
+                logger.info(f"  - Frame ID: {data['frame_id']}")
                 
-                if response.status == 200:
-                    data = await response.json()
-                    inference_time = (end_time - start_time) * 1000
-                    
-                    logger.info(f"✓ Object Detection successful")
-                    logger.info(f"  - Response time: {inference_time:.2f}ms")
-                    logger.info(f"  - Detections found: {len(data['detections'])}")
-                    logger.info(f"  - Frame ID: {data['frame_id']}")
-                    
-                    # Log detection details
-                    for i, det in enumerate(data['detections'][:3]):  # Show first 3
-                        logger.info(f"  - Detection {i+1}: {det['class_name']} ({det['confidence']:.2f})")
-                    
-                    results["object_detection"] = True
-                else:
-                    error_text = await response.text()
-                    logger.error(f"✗ Object Detection failed: {response.status} - {error_text}")
-                    results["object_detection"] = False
+                # Log detection details
+                for i, det in enumerate(data['detections'][:3]):  # Show first 3
+                    logger.info(f"  - Detection {i+1}: {det['class_name']} ({det['confidence']:.2f})")
+                
+                results["object_detection"] = True
+        except aiohttp.ClientResponseError as e:
+            logger.error("✗ Object Detection failed: %s %s %s", e.request_info.url, e.status, e.message)
+            results["object_detection"] = False
         except Exception as e:
             logger.error(f"✗ Object Detection error: {e}")
             results["object_detection"] = False
@@ -123,25 +119,19 @@ class FocusedBackendTester:
                 json=test_metrics,
                 headers={"Content-Type": "application/json"}
             ) as response:
-                if response.status == 200:
-                    save_data = await response.json()
-                    logger.info(f"✓ Metrics saved: {save_data['status']}")
-                    
-                    # Retrieve latest metrics
-                    async with self.session.get(f"{API_BASE}/metrics/latest") as get_response:
-                        if get_response.status == 200:
-                            latest_data = await get_response.json()
-                            logger.info(f"✓ Latest metrics retrieved")
-                            logger.info(f"  - E2E Latency: {latest_data.get('e2e_latency_median', 'N/A')}ms")
-                            logger.info(f"  - Processed FPS: {latest_data.get('processed_fps', 'N/A')}")
-                            results["metrics"] = True
-                        else:
-                            logger.error(f"✗ Metrics retrieval failed: {get_response.status}")
-                            results["metrics"] = False
-                else:
-                    error_text = await response.text()
-                    logger.error(f"✗ Metrics save failed: {response.status} - {error_text}")
-                    results["metrics"] = False
+                save_data = await response.json()
+                logger.info(f"✓ Metrics saved: {save_data['status']}")
+            
+            # Retrieve latest metrics
+            async with self.session.get(f"{API_BASE}/metrics/latest") as get_response:
+                latest_data = await get_response.json()
+                logger.info(f"✓ Latest metrics retrieved")
+                logger.info(f"  - E2E Latency: {latest_data.get('e2e_latency_median', 'N/A')}ms")
+                logger.info(f"  - Processed FPS: {latest_data.get('processed_fps', 'N/A')}")
+                results["metrics"] = True
+        except aiohttp.ClientResponseError as e:
+            logger.error("✗ Metrics system failed: %s %s %s", e.request_info.url, e.status, e.message)
+            results["metrics"] = False
         except Exception as e:
             logger.error(f"✗ Metrics system error: {e}")
             results["metrics"] = False
@@ -151,16 +141,14 @@ class FocusedBackendTester:
         try:
             test_room_id = f"test_room_{uuid.uuid4().hex[:8]}"
             async with self.session.get(f"{API_BASE}/rooms/{test_room_id}/users") as response:
-                if response.status == 200:
-                    data = await response.json()
-                    logger.info(f"✓ Room Management successful")
-                    logger.info(f"  - Room ID: {data['room_id']}")
-                    logger.info(f"  - User count: {data['count']}")
-                    results["room_management"] = True
-                else:
-                    error_text = await response.text()
-                    logger.error(f"✗ Room Management failed: {response.status} - {error_text}")
-                    results["room_management"] = False
+                data = await response.json()
+                logger.info(f"✓ Room Management successful")
+                logger.info(f"  - Room ID: {data['room_id']}")
+                logger.info(f"  - User count: {data['count']}")
+                results["room_management"] = True
+        except aiohttp.ClientResponseError as e:
+            logger.error("✗ Room Management failed: %s %s %s", e.request_info.url, e.status, e.message)
+            results["room_management"] = False
         except Exception as e:
             logger.error(f"✗ Room Management error: {e}")
             results["room_management"] = False
@@ -183,7 +171,8 @@ class FocusedBackendTester:
                 task = self.session.post(
                     f"{API_BASE}/detect",
                     json=detection_request,
-                    headers={"Content-Type": "application/json"}
+                    headers={"Content-Type": "application/json"},
+                    raise_for_status=False  # Success rate is counted per response below
                 )
                 tasks.append(task)
             
@@ -4,21 +4,115 @@ Local WebSocket Test - Test WebRTC signaling locally to verify backend implement
 """
 
 import asyncio
+import collections
 import websockets
-import json
+import uvloop
 import time
 import uuid
 import logging
-import base64
-from PIL import Image
-import io
+import socket
+
+from signaling_common import (
+    WS_CONNECT_OPTIONS as _BASE_WS_OPTIONS, dumps as _dumps, loads as _loads, recv_until, tune_socket as _tune_socket
+)
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Local server: fail fast on open and don't wait on close
+WS_CONNECT_OPTIONS = {**_BASE_WS_OPTIONS, "open_timeout": 2, "close_timeout": 0}
+
+# Resolve once so each connect skips getaddrinfo
+LOCAL_HOST = socket.gethostbyname("localhost")
+
+# 300x300 blue frame with a red square at (50, 50)-(150, 150), JPEG-encoded offline
+_TEST_JPEG_B64 = (
+    "/9j/4AAQSkZJRgABAQAAAQABAAD/2wBDAAgGBgcGBQgHBwcJCQgKDBQNDAsLDBkSEw8UHRofHh0a"
+    "HBwgJC4nICIsIxwcKDcpLDAxNDQ0Hyc5PTgyPC4zNDL/2wBDAQkJCQwLDBgNDRgyIRwhMjIyMjIy"
+    "MjIyMjIyMjIyMjIyMjIyMjIyMjIyMjIyMjIyMjIyMjIyMjIyMjIyMjIyMjL/wAARCAEsASwDASIA"
+    "AhEBAxEB/8QAGAABAQEBAQAAAAAAAAAAAAAAAAQGBQf/xAAkEAEAAAMIAgMAAAAAAAAAAAAAAQME"
+    "BRU1U4GisdEREgJBYf/EABoBAQADAQEBAAAAAAAAAAAAAAAFBgcIAwT/xAAtEQEAAgACBwcFAQEA"
+    "AAAAAAAAAQIDBQQGETVScrIVFiGRktHSEkFRU1QiYf/aAAwDAQACEQMRAD8A8cAbijAAAAAAAAAA"
+    "AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA"
+    "AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAHaoKCmnUUuZMle3zj58x9ow+4/qm66PJ3R7LLw6VrzFY"
+    "wvN83zDDzDHpTHvERe0REWtsiPqnwjxbLleV6DfQcG98GkzNKzMzWPHwj/iO66PJ3R7Lro8ndHtY"
+    "I/trM/6L+u3u+7sjL/0U9NfZHddHk7o9l10eTuj2sDtrM/6L+u3udkZf+inpr7I7ro8ndHsuujyd"
+    "0e1gdtZn/Rf129zsjL/0U9NfZHddHk7o9l10eTuj2sDtrM/6L+u3udkZf+inpr7I7ro8ndHsuujy"
+    "d0e1gdtZn/Rf129zsjL/ANFPTX2cqvoKaTRTJkuV6/OHjxH2jH7h+uK0dqYdN05gzjUtSNKx9Jy+"
+    "98e83n65jbMzM7Ppr4eLONcNGwdH06lMGkVj6InZERH3t+ABclTAAAAAAAAAAAAAAAAAAAAAAaOy"
+    "8Ola8xWI7Lw6VrzFY57zreekc9+qW55Ru/A5K9MACMSIAAAAAAACO1MOm6cwZxo7Uw6bpzBnGvag"
+    "bsvzz01ZbrvvCnJHVYAXlTQAAAAAAAAAAAAAAAAAAAAAGjsvDpWvMViOy8Ola8xWOe863npHPfql"
+    "ueUbvwOSvTAAjEiAAAAAAAAjtTDpunMGcaO1MOm6cwZxr2oG7L889NWW677wpyR1WAF5U0AAAAAA"
+    "AAAAAAAAAAAAAAABo7Lw6VrzFYjsvDpWvMVjnvOt56Rz36pbnlG78Dkr0wAIxIgAAAAAAAI7Uw6b"
+    "pzBnGjtTDpunMGca9qBuy/PPTVluu+8KckdVgBeVNAAAAAAAAAAAAAAAAAAAAAAaOy8Ola8xWI7L"
+    "w6VrzFY57zreekc9+qW55Ru/A5K9MACMSIAAAAAAACO1MOm6cwZxo7Uw6bpzBnGvagbsvzz01Zbr"
+    "vvCnJHVYAXlTQAAAAAAAAAAAAAAAAAAAAAGjsvDpWvMViOy8Ola8xWOe863npHPfqlueUbvwOSvT"
+    "AAjEiAAAAAAAAjtTDpunMGcaO1MOm6cwZxr2oG7L889NWW677wpyR1WAF5U0AAAAAAAAAAAAAAAA"
+    "AAAAAB2qCvppNFLlzJvr84efMPWMfuP4pvSjztsemcFN0rUjL9Jx7497323mZnZNdm2Z2+H+Vs0b"
+    "XDTtHwaYNKU2ViIjbE/aNnE0d6Uedtj0XpR522PTODw7gZZx386/F7d98w4KeVvk0d6Uedtj0XpR"
+    "522PTOB3Ayzjv51+J33zDgp5W+TR3pR522PRelHnbY9M4HcDLOO/nX4nffMOCnlb5NHelHnbY9F6"
+    "Uedtj0zgdwMs47+dfid98w4KeVvk0d6Uedtj0XpR522PTOB3Ayzjv51+J33zDgp5W+TtV9fTTqKZ"
+    "Llzfb5x8eIesYfcPxxQWTJ8nwMpwJwMCZmJnb47Nu3ZEfaI/CAzXNcbM8aMbGiImI2eG38zP3mfy"
+    "AJVGAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA"
+    "AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA"
+    "AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA"
+    "AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA"
+    "AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAP/2Q=="
+)
+
+# Signaling payloads are fixed, so serialize them once at import time
+_OFFER_BYTES = _dumps({
+    "type": "offer",
+    "data": {
+        "sdp": "v=0\r\no=- 4611731400430051336 2 IN IP4 127.0.0.1\r\ns=-\r\nt=0 0\r\na=group:BUNDLE 0\r\na=extmap-allow-mixed\r\na=msid-semantic: WMS\r\nm=video 9 UDP/TLS/RTP/SAVPF 96 97\r\nc=IN IP4 0.0.0.0\r\na=rtcp:9 IN IP4 0.0.0.0\r\na=ice-ufrag:4ZcD\r\na=ice-pwd:2/1muCWoOi3uLifh0NuRHgpw\r\na=ice-options:trickle\r\na=fingerprint:sha-256 75:74:5A:A6:A4:E5:52:F4:A7:67:4C:01:C7:EE:91:3F:21:3D:A2:E3:53:7B:6F:30:86:F2:30:FF:A6:22:D2:04\r\na=setup:actpass\r\na=mid:0\r\na=sendrecv\r\na=rtcp-mux\r\na=rtcp-rsize\r\na=rtpmap:96 VP8/90000\r\na=rtcp-fb:96 goog-remb\r\na=rtcp-fb:96 transport-cc\r\n",
+        "type": "offer"
+    }
+})
+
+_ANSWER_BYTES = _dumps({
+    "type": "answer",
+    "data": {
+        "sdp": "v=0\r\no=- 1234567890 2 IN IP4 127.0.0.1\r\ns=-\r\nt=0 0\r\na=group:BUNDLE 0\r\na=extmap-allow-mixed\r\na=msid-semantic: WMS\r\nm=video 9 UDP/TLS/RTP/SAVPF 96 97\r\nc=IN IP4 0.0.0.0\r\na=rtcp:9 IN IP4 0.0.0.0\r\na=ice-ufrag:abcd\r\na=ice-pwd:efghijklmnopqrstuvwxyz123456\r\na=ice-options:trickle\r\na=fingerprint:sha-256 AA:BB:CC:DD:EE:FF:00:11:22:33:44:55:66:77:88:99:AA:BB:CC:DD:EE:FF:00:11:22:33:44:55:66:77:88:99\r\na=setup:active\r\na=mid:0\r\na=sendrecv\r\na=rtcp-mux\r\na=rtcp-rsize\r\na=rtpmap:96 VP8/90000\r\n",
+        "type": "answer"
+    }
+})
+
+_ICE_PHONE_BYTES = _dumps({
+    "type": "ice_candidate",
+    "data": {
+        "candidate": "candidate:842163049 1 udp 1677729535 192.168.1.100 54400 typ srflx raddr 192.168.1.100 rport 54400 generation 0 ufrag 4ZcD network-cost 999",
+        "sdpMLineIndex": 0,
+        "sdpMid": "0"
+    }
+})
+
+_ICE_LAPTOP_BYTES = _dumps({
+    "type": "ice_candidate",
+    "data": {
+        "candidate": "candidate:987654321 1 udp 1677729535 10.0.0.50 45678 typ host generation 0 ufrag abcd network-cost 50",
+        "sdpMLineIndex": 0,
+        "sdpMid": "0"
+    }
+})
+
+async def _parse_big(raw):
+    """Decode a message, parsing payloads over 64 KiB in a worker thread"""
+    if len(raw) > 65536:
+        return await asyncio.to_thread(_loads, raw)
+    return _loads(raw)
+
+async def _recv_json(ws, timeout: float = 5.0) -> dict:
+    """Receive and decode one message under a single deadline"""
+    async with asyncio.timeout(timeout):
+        raw = await ws.recv()
+    return await _parse_big(raw)
+
 class LocalWebSocketTester:
     def __init__(self):
-        self.message_log = []
+        self.message_log = collections.deque(maxlen=256)
+        
+        # The detection test frame is fixed; only frame_id varies per send
+        self._test_image_b64 = f"data:image/jpeg;base64,{_TEST_JPEG_B64}"
         
     def log_message(self, direction: str, client: str, message: dict):
         """Log WebSocket messages for debugging"""
@@ -30,22 +124,12 @@ class LocalWebSocketTester:
             "message": message
         }
         self.message_log.append(log_entry)
-        logger.info(f"[{client}] {direction.upper()}: {message.get('type', 'unknown')}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("[%s] %s: %s", client, direction.upper(), message.get('type', 'unknown'))
     
     def create_test_image(self) -> str:
-        """Create a test image and return as base64 encoded string"""
-        image = Image.new('RGB', (300, 300), color='blue')
-        
-        # Add some simple shapes
-        pixels = image.load()
-        for i in range(50, 150):
-            for j in range(50, 150):
-                pixels[i, j] = (255, 0, 0)  # Red square
-        
-        buffer = io.BytesIO()
-        image.save(buffer, format='JPEG')
-        image_data = base64.b64encode(buffer.getvalue()).decode()
-        return f"data:image/jpeg;base64,{image_data}"
+        """Return the cached test image as a base64 data URL"""
+        return self._test_image_b64
     
     async def test_complete_webrtc_signaling_flow(self) -> bool:
         """Test complete WebRTC signaling flow locally"""
@@ -54,36 +138,31 @@ class LocalWebSocketTester:
         logger.info("=" * 60)
         
         test_room_id = f"local_test_{uuid.uuid4().hex[:8]}"
-        ws_url = f"ws://localhost:8001/ws/{test_room_id}"
+        ws_url = f"ws://{LOCAL_HOST}:8001/ws/{test_room_id}"
         
         try:
             # Connect two clients (phone and laptop simulation)
-            async with websockets.connect(ws_url) as phone_ws, websockets.connect(ws_url) as laptop_ws:
+            async with websockets.connect(ws_url, **WS_CONNECT_OPTIONS) as phone_ws, websockets.connect(ws_url, **WS_CONNECT_OPTIONS) as laptop_ws:
                 logger.info("✓ Phone and Laptop clients connected locally")
+                _tune_socket(phone_ws)
+                _tune_socket(laptop_ws)
                 
-                # Wait for connection setup
-                await asyncio.sleep(0.5)
+                # Ready once the phone has seen the laptop join, so that notice
+                # can't arrive after the roster reply below
+                await recv_until(phone_ws, "user_joined", timeout=5.0)
                 
-                # Clear initial user_joined messages
-                try:
-                    while True:
-                        await asyncio.wait_for(phone_ws.recv(), timeout=0.1)
-                except asyncio.TimeoutError:
-                    pass
-                try:
-                    while True:
-                        await asyncio.wait_for(laptop_ws.recv(), timeout=0.1)
-                except asyncio.TimeoutError:
-                    pass
-                
-                # Step 1: Test room users
+                # Step 1: Test room users; the roster reply also marks the end
+                # of the initial user_joined messages on both sockets
                 logger.info("Step 1: Testing room user management...")
                 get_users_msg = {"type": "get_room_users"}
-                await phone_ws.send(json.dumps(get_users_msg))
+                get_users_raw = _dumps(get_users_msg)
+                await asyncio.gather(phone_ws.send(get_users_raw), laptop_ws.send(get_users_raw))
                 self.log_message("sent", "phone", get_users_msg)
                 
-                response = await asyncio.wait_for(phone_ws.recv(), timeout=5.0)
-                data = json.loads(response)
+                data, _ = await asyncio.gather(
+                    recv_until(phone_ws, "room_users", timeout=5.0),
+                    recv_until(laptop_ws, "room_users", timeout=5.0)
+                )
                 self.log_message("received", "phone", data)
                 
                 if data.get("type") == "room_users":
@@ -96,21 +175,13 @@ class LocalWebSocketTester:
                 
                 # Step 2: Phone sends WebRTC offer
                 logger.info("Step 2: Phone sending WebRTC offer...")
-                offer_message = {
-                    "type": "offer",
-                    "data": {
-                        "sdp": "v=0\r\no=- 4611731400430051336 2 IN IP4 127.0.0.1\r\ns=-\r\nt=0 0\r\na=group:BUNDLE 0\r\na=extmap-allow-mixed\r\na=msid-semantic: WMS\r\nm=video 9 UDP/TLS/RTP/SAVPF 96 97\r\nc=IN IP4 0.0.0.0\r\na=rtcp:9 IN IP4 0.0.0.0\r\na=ice-ufrag:4ZcD\r\na=ice-pwd:2/1muCWoOi3uLifh0NuRHgpw\r\na=ice-options:trickle\r\na=fingerprint:sha-256 75:74:5A:A6:A4:E5:52:F4:A7:67:4C:01:C7:EE:91:3F:21:3D:A2:E3:53:7B:6F:30:86:F2:30:FF:A6:22:D2:04\r\na=setup:actpass\r\na=mid:0\r\na=sendrecv\r\na=rtcp-mux\r\na=rtcp-rsize\r\na=rtpmap:96 VP8/90000\r\na=rtcp-fb:96 goog-remb\r\na=rtcp-fb:96 transport-cc\r\n",
-                        "type": "offer"
-                    }
-                }
                 
-                await phone_ws.send(json.dumps(offer_message))
-                self.log_message("sent", "phone", offer_message)
+                await phone_ws.send(_OFFER_BYTES)
+                self.log_message("sent", "phone", {"type": "offer"})
                 
                 # Step 3: Laptop receives offer
                 logger.info("Step 3: Laptop waiting for offer...")
-                laptop_response = await asyncio.wait_for(laptop_ws.recv(), timeout=5.0)
-                laptop_data = json.loads(laptop_response)
+                laptop_data = await _recv_json(laptop_ws)
                 self.log_message("received", "laptop", laptop_data)
                 
                 if laptop_data.get("type") == "offer":
@@ -122,21 +193,13 @@ class LocalWebSocketTester:
                 
                 # Step 4: Laptop sends answer
                 logger.info("Step 4: Laptop sending WebRTC answer...")
-                answer_message = {
-                    "type": "answer",
-                    "data": {
-                        "sdp": "v=0\r\no=- 1234567890 2 IN IP4 127.0.0.1\r\ns=-\r\nt=0 0\r\na=group:BUNDLE 0\r\na=extmap-allow-mixed\r\na=msid-semantic: WMS\r\nm=video 9 UDP/TLS/RTP/SAVPF 96 97\r\nc=IN IP4 0.0.0.0\r\na=rtcp:9 IN IP4 0.0.0.0\r\na=ice-ufrag:abcd\r\na=ice-pwd:efghijklmnopqrstuvwxyz123456\r\na=ice-options:trickle\r\na=fingerprint:sha-256 AA:BB:CC:DD:EE:FF:00:11:22:33:44:55:66:77:88:99:AA:BB:CC:DD:EE:FF:00:11:22:33:44:55:66:77:88:99\r\na=setup:active\r\na=mid:0\r\na=sendrecv\r\na=rtcp-mux\r\na=rtcp-rsize\r\na=rtpmap:96 VP8/90000\r\n",
-                        "type": "answer"
-                    }
-                }
                 
-                await laptop_ws.send(json.dumps(answer_message))
-                self.log_message("sent", "laptop", answer_message)
+                await laptop_ws.send(_ANSWER_BYTES)
+                self.log_message("sent", "laptop", {"type": "answer"})
                 
                 # Step 5: Phone receives answer
                 logger.info("Step 5: Phone waiting for answer...")
-                phone_response = await asyncio.wait_for(phone_ws.recv(), timeout=5.0)
-                phone_data = json.loads(phone_response)
+                phone_data = await _recv_json(phone_ws)
                 self.log_message("received", "phone", phone_data)
                 
                 if phone_data.get("type") == "answer":
@@ -150,42 +213,25 @@ class LocalWebSocketTester:
                 logger.info("Step 6: Testing ICE candidate exchange...")
                 
                 # Phone sends ICE candidate
-                ice_candidate_message = {
-                    "type": "ice_candidate",
-                    "data": {
-                        "candidate": "candidate:842163049 1 udp 1677729535 192.168.1.100 54400 typ srflx raddr 192.168.1.100 rport 54400 generation 0 ufrag 4ZcD network-cost 999",
-                        "sdpMLineIndex": 0,
-                        "sdpMid": "0"
-                    }
-                }
-                
-                await phone_ws.send(json.dumps(ice_candidate_message))
-                self.log_message("sent", "phone", ice_candidate_message)
+                await phone_ws.send(_ICE_PHONE_BYTES)
+                self.log_message("sent", "phone", {"type": "ice_candidate"})
                 
                 # Laptop receives ICE candidate
-                laptop_ice_response = await asyncio.wait_for(laptop_ws.recv(), timeout=5.0)
-                laptop_ice_data = json.loads(laptop_ice_response)
+                laptop_ice_data = await _recv_json(laptop_ws)
                 self.log_message("received", "laptop", laptop_ice_data)
                 
                 if laptop_ice_data.get("type") == "ice_candidate":
                     logger.info("✓ Laptop received ICE candidate")
                     
-                    # Laptop sends ICE candidate back
-                    laptop_ice_message = {
-                        "type": "ice_candidate",
-                        "data": {
-                            "candidate": "candidate:987654321 1 udp 1677729535 10.0.0.50 45678 typ host generation 0 ufrag abcd network-cost 50",
-                            "sdpMLineIndex": 0,
-                            "sdpMid": "0"
-                        }
-                    }
-                    
-                    await laptop_ws.send(json.dumps(laptop_ice_message))
-                    self.log_message("sent", "laptop", laptop_ice_message)
+                    # Laptop sends ICE candidate back, with the phone already listening
+                    phone_ice_task = asyncio.create_task(phone_ws.recv())
+                    await laptop_ws.send(_ICE_LAPTOP_BYTES)
+                    self.log_message("sent", "laptop", {"type": "ice_candidate"})
                     
                     # Phone receives laptop's ICE candidate
-                    phone_ice_response = await asyncio.wait_for(phone_ws.recv(), timeout=5.0)
-                    phone_ice_data = json.loads(phone_ice_response)
+                    async with asyncio.timeout(5.0):
+                        phone_ice_response = await phone_ice_task
+                    phone_ice_data = _loads(phone_ice_response)
                     self.log_message("received", "phone", phone_ice_data)
                     
                     if phone_ice_data.get("type") == "ice_candidate":
@@ -200,22 +246,20 @@ class LocalWebSocketTester:
                 
                 # Step 7: Test detection frame processing
                 logger.info("Step 7: Testing detection frame processing...")
-                test_image = self.create_test_image()
                 frame_id = str(uuid.uuid4())
                 
                 detection_message = {
                     "type": "detection_frame",
                     "frame_id": frame_id,
-                    "frame_data": test_image,
+                    "frame_data": self.create_test_image(),
                     "capture_ts": time.time()
                 }
                 
-                await phone_ws.send(json.dumps(detection_message))
+                await phone_ws.send(_dumps(detection_message))
                 self.log_message("sent", "phone", detection_message)
                 
                 # Wait for detection result
-                detection_result = await asyncio.wait_for(phone_ws.recv(), timeout=10.0)
-                detection_data = json.loads(detection_result)
+                detection_data = await _recv_json(phone_ws, timeout=10.0)
                 self.log_message("received", "phone", detection_data)
                 
                 if detection_data.get("type") == "detection_result":
@@ -269,5 +313,6 @@ async def main():
     return result
 
 if __name__ == "__main__":
-    result = asyncio.run(main())
+    with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+        result = runner.run(main())
     exit(0 if result else 1)
\ No newline at end of file
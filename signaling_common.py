@@ -0,0 +1,54 @@
+"""
+Helpers shared by the signaling test scripts in this directory
+orjson and websockets are required, as listed in backend/requirements.txt
+"""
+
+import asyncio
+import socket
+
+import orjson
+
+# Frames are JSON or already-compressed JPEG, so skip permessage-deflate;
+# scripts add their own timeouts and TLS settings on top
+WS_CONNECT_OPTIONS = {"compression": None, "max_size": 2**22, "max_queue": None}
+
+
+def dumps(message: dict) -> bytes:
+    """Serialize a signaling message; bytes go out as a binary frame, which
+    only backends with binary-frame support accept, so use it for local targets"""
+    return orjson.dumps(message)
+
+
+def dumps_text(message: dict) -> str:
+    """Serialize to str for text frames (remote deployments) and aiohttp's json_serialize hook"""
+    return orjson.dumps(message).decode()
+
+
+loads = orjson.loads
+
+
+def tune_socket(ws):
+    """Disable Nagle and enlarge the kernel buffers on an open connection"""
+    sock = ws.transport.get_extra_info("socket")
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 20)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+
+
+async def drain(ws, grace: float):
+    """Discard queued messages, spending at most `grace` seconds in total"""
+    try:
+        async with asyncio.timeout(grace):
+            async for _ in ws:
+                pass
+    except TimeoutError:
+        pass
+
+
+async def recv_until(ws, *msg_types: str, timeout: float) -> dict:
+    """Read from ws until a message of one of msg_types arrives, discarding anything before it"""
+    async with asyncio.timeout(timeout):
+        while True:
+            data = loads(await ws.recv())
+            if data.get("type") in msg_types:
+                return data
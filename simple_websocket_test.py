@@ -5,9 +5,11 @@ Simple WebSocket connectivity test
 
 import asyncio
 import websockets
-import json
+import uvloop
 import logging
 
+from signaling_common import WS_CONNECT_OPTIONS, dumps_text
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -18,11 +20,11 @@ async def test_websocket_simple():
         external_url = "wss://live-object-detect.preview.emergentagent.com/ws/test_room"
         logger.info(f"Testing WebSocket connection to: {external_url}")
         
-        async with websockets.connect(external_url, timeout=5) as websocket:
+        async with websockets.connect(external_url, timeout=5, **WS_CONNECT_OPTIONS) as websocket:
             logger.info("✓ WebSocket connected successfully")
             
             # Send a simple message
-            await websocket.send(json.dumps({"type": "get_room_users"}))
+            await websocket.send(dumps_text({"type": "get_room_users"}))
             
             # Try to receive response
             response = await asyncio.wait_for(websocket.recv(), timeout=5)
@@ -37,10 +39,10 @@ async def test_websocket_simple():
             internal_url = "ws://localhost:8001/ws/test_room"
             logger.info(f"Testing internal WebSocket: {internal_url}")
             
-            async with websockets.connect(internal_url, timeout=5) as websocket:
+            async with websockets.connect(internal_url, timeout=5, **WS_CONNECT_OPTIONS) as websocket:
                 logger.info("✓ Internal WebSocket connected successfully")
                 
-                await websocket.send(json.dumps({"type": "get_room_users"}))
+                await websocket.send(dumps_text({"type": "get_room_users"}))
                 response = await asyncio.wait_for(websocket.recv(), timeout=5)
                 logger.info(f"✓ Received response: {response}")
                 return True
@@ -53,7 +55,7 @@ async def test_error_details():
     """Test error handling with detailed response"""
     import aiohttp
     
-    async with aiohttp.ClientSession() as session:
+    async with aiohttp.ClientSession(json_serialize=dumps_text) as session:
         try:
             invalid_request = {
                 "image_data": "invalid_base64_data",
@@ -82,5 +84,6 @@ async def main():
     return ws_result
 
 if __name__ == "__main__":
-    result = asyncio.run(main())
+    with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+        result = runner.run(main())
     print(f"WebSocket test result: {result}")
\ No newline at end of file
@@ -4,19 +4,25 @@ Simple WebSocket connection test
 """
 
 import asyncio
+import socket
 import websockets
-import json
+import uvloop
+
+from signaling_common import WS_CONNECT_OPTIONS, dumps as _dumps
 
 async def test_websocket():
-    uri = "ws://localhost:8001/ws/test123"
+    uri = f"ws://{socket.gethostbyname('localhost')}:8001/ws/test123"
     print(f"Attempting to connect to: {uri}")
     
     try:
-        async with websockets.connect(uri) as websocket:
+        async with websockets.connect(
+            uri, **WS_CONNECT_OPTIONS,
+            ping_interval=None, ping_timeout=None, open_timeout=2, close_timeout=0
+        ) as websocket:
             print("✓ WebSocket connected successfully!")
             
             # Send a test message
-            await websocket.send(json.dumps({"type": "get_room_users"}))
+            await websocket.send(_dumps({"type": "get_room_users"}))
             print("✓ Message sent")
             
             # Wait for response
@@ -27,4 +33,5 @@ async def test_websocket():
         print(f"✗ WebSocket connection failed: {e}")
 
 if __name__ == "__main__":
-    asyncio.run(test_websocket())
\ No newline at end of file
+    with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+        runner.run(test_websocket())
\ No newline at end of file
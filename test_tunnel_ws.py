@@ -5,18 +5,22 @@ Test WebSocket connection through tunnel
 
 import asyncio
 import websockets
-import json
+import uvloop
+
+from signaling_common import WS_CONNECT_OPTIONS, dumps_text as _dumps
 
 async def test_tunnel_websocket():
     uri = "wss://732980370df48a.lhr.life/ws/test123"
     print(f"Attempting to connect to: {uri}")
     
     try:
-        async with websockets.connect(uri) as websocket:
+        async with websockets.connect(
+            uri, **WS_CONNECT_OPTIONS, ping_interval=None
+        ) as websocket:
             print("✓ Tunnel WebSocket connected successfully!")
             
             # Send a test message
-            await websocket.send(json.dumps({"type": "get_room_users"}))
+            await websocket.send(_dumps({"type": "get_room_users"}))
             print("✓ Message sent")
             
             # Wait for response
@@ -24,7 +28,7 @@ async def test_tunnel_websocket():
             print(f"✓ Response received: {response}")
             
             # Test WebRTC signaling
-            await websocket.send(json.dumps({
+            await websocket.send(_dumps({
                 "type": "offer", 
                 "data": {"sdp": "test-sdp", "type": "offer"}
             }))
@@ -34,4 +38,5 @@ async def test_tunnel_websocket():
         print(f"✗ Tunnel WebSocket connection failed: {e}")
 
 if __name__ == "__main__":
-    asyncio.run(test_tunnel_websocket())
\ No newline at end of file
+    with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+        runner.run(test_tunnel_websocket())
\ No newline at end of file
@@ -5,32 +5,66 @@ Simulate WebRTC Signaling Flow to Test Complete Connection
 
 import asyncio
 import websockets
-import json
+import uvloop
 import uuid
 import time
 
+from signaling_common import WS_CONNECT_OPTIONS, dumps_text as _dumps, loads as _loads, tune_socket as _tune_socket
+
+async def _wait_for_event(event: asyncio.Event, label: str, timeout: float = 5.0):
+    """Wait for a signaling step to complete instead of sleeping a fixed time"""
+    try:
+        await asyncio.wait_for(event.wait(), timeout)
+    except asyncio.TimeoutError:
+        print(f"⚠️  Timed out waiting for {label}")
+
+async def _writer(ws, queue: asyncio.Queue):
+    """Send queued messages in order until a None sentinel arrives"""
+    while True:
+        batch = [await queue.get()]
+        # Flush everything already queued back to back
+        while not queue.empty():
+            batch.append(queue.get_nowait())
+        for message in batch:
+            if message is None:
+                return
+            await ws.send(message)
+
 async def simulate_webrtc_peers():
     """Simulate both browser and phone connecting and exchanging WebRTC signaling"""
     room_id = "TESTROOM"
     
     # Connect browser peer
     print("🖥️  Connecting browser peer...")
-    browser_ws = await websockets.connect(f"wss://732980370df48a.lhr.life/ws/{room_id}")
+    browser_ws = await websockets.connect(f"wss://732980370df48a.lhr.life/ws/{room_id}", **WS_CONNECT_OPTIONS)
+    _tune_socket(browser_ws)
     print("✓ Browser connected")
     
     # Connect phone peer  
     print("📱 Connecting phone peer...")
-    phone_ws = await websockets.connect(f"wss://732980370df48a.lhr.life/ws/{room_id}")
+    phone_ws = await websockets.connect(f"wss://732980370df48a.lhr.life/ws/{room_id}", **WS_CONNECT_OPTIONS)
+    _tune_socket(phone_ws)
     print("✓ Phone connected")
     
+    # Set by the message handlers as each signaling step arrives
+    peer_joined = asyncio.Event()
+    answer_received = asyncio.Event()
+    browser_ice_received = asyncio.Event()
+    phone_ice_received = asyncio.Event()
+    detection_done = asyncio.Event()
+    
     async def handle_browser_messages():
         async for message in browser_ws:
-            data = json.loads(message)
+            data = _loads(message)
             print(f"🖥️  Browser received: {data.get('type')}")
             
-            if data.get('type') == 'offer':
+            if data.get('type') == 'user_joined':
+                peer_joined.set()
+            elif data.get('type') == 'ice_candidate':
+                browser_ice_received.set()
+            elif data.get('type') == 'offer':
                 # Browser responds with answer
-                await browser_ws.send(json.dumps({
+                browser_queue.put_nowait(_dumps({
                     "type": "answer",
                     "data": {
                         "sdp": "fake-answer-sdp",
@@ -42,19 +76,30 @@ async def simulate_webrtc_peers():
                 
     async def handle_phone_messages():
         async for message in phone_ws:
-            data = json.loads(message)
+            data = _loads(message)
             print(f"📱 Phone received: {data.get('type')}")
+            
+            if data.get('type') == 'answer':
+                answer_received.set()
+            elif data.get('type') == 'ice_candidate':
+                phone_ice_received.set()
+            elif data.get('type') in ('detection_result', 'detection_error'):
+                detection_done.set()
     
-    # Start message handlers
+    # Start message handlers and one writer per peer
+    browser_queue = asyncio.Queue()
+    phone_queue = asyncio.Queue()
+    browser_writer = asyncio.create_task(_writer(browser_ws, browser_queue))
+    phone_writer = asyncio.create_task(_writer(phone_ws, phone_queue))
     browser_task = asyncio.create_task(handle_browser_messages())
     phone_task = asyncio.create_task(handle_phone_messages())
     
-    # Wait a moment for connections to settle
-    await asyncio.sleep(1)
+    # Wait for the browser to see the phone join the room
+    await _wait_for_event(peer_joined, "phone to join")
     
     # Phone sends offer
     print("📱 Phone sending offer...")
-    await phone_ws.send(json.dumps({
+    phone_queue.put_nowait(_dumps({
         "type": "offer",
         "data": {
             "sdp": "fake-offer-sdp", 
@@ -62,12 +107,13 @@ async def simulate_webrtc_peers():
         }
     }))
     
-    # Wait for signaling exchange
-    await asyncio.sleep(2)
+    # Wait for the browser's answer to reach the phone
+    await _wait_for_event(answer_received, "answer")
     
-    # Send ICE candidates
+    # Both peers trickle their ICE candidates at the same time
     print("📱 Phone sending ICE candidate...")
-    await phone_ws.send(json.dumps({
+    print("🖥️  Browser sending ICE candidate...")
+    phone_queue.put_nowait(_dumps({
         "type": "ice_candidate",
         "data": {
             "candidate": "candidate:fake-ice-candidate",
@@ -75,11 +121,7 @@ async def simulate_webrtc_peers():
             "sdpMLineIndex": 0
         }
     }))
-    
-    await asyncio.sleep(2)
-    
-    print("🖥️  Browser sending ICE candidate...")  
-    await browser_ws.send(json.dumps({
+    browser_queue.put_nowait(_dumps({
         "type": "ice_candidate",
         "data": {
             "candidate": "candidate:fake-ice-candidate-browser",
@@ -88,10 +130,12 @@ async def simulate_webrtc_peers():
         }
     }))
     
+    await _wait_for_event(phone_ice_received, "browser ICE candidate")
+    await _wait_for_event(browser_ice_received, "phone ICE candidate")
+    
     # Simulate detection frame processing
-    await asyncio.sleep(1)
     print("📱 Phone sending detection frame...")
-    await phone_ws.send(json.dumps({
+    phone_queue.put_nowait(_dumps({
         "type": "detection_frame",
         "frame_data": "data:image/jpeg;base64,/9j/4AAQSkZJRgABAQEASABIAAD/",  # minimal jpeg
         "frame_id": str(uuid.uuid4()),
@@ -99,9 +143,12 @@ async def simulate_webrtc_peers():
     }))
     
     # Wait for processing
-    await asyncio.sleep(3)
+    await _wait_for_event(detection_done, "detection result")
     
     # Clean up
+    browser_queue.put_nowait(None)
+    phone_queue.put_nowait(None)
+    await asyncio.gather(browser_writer, phone_writer)
     browser_task.cancel()
     phone_task.cancel()
     await browser_ws.close()
@@ -110,4 +157,5 @@ async def simulate_webrtc_peers():
     print("✅ WebRTC signaling flow simulation completed successfully!")
 
 if __name__ == "__main__":
-    asyncio.run(simulate_webrtc_peers())
\ No newline at end of file
+    with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+        runner.run(simulate_webrtc_peers())
\ No newline at end of file
@@ -5,40 +5,224 @@ Tests the specific WebRTC signaling flow: offer→answer→ice candidate exchang
 """
 
 import asyncio
+import contextvars
+import itertools
+import secrets
+import ssl
 import websockets
-import json
 import time
 import uuid
 import logging
-from typing import Dict, List, Any
+import re
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Any, Optional, Union
 
-# Configure detailed logging
-logging.basicConfig(
-    level=logging.INFO, 
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+from signaling_common import WS_CONNECT_OPTIONS as _BASE_WS_OPTIONS, drain, dumps_text as _dumps, loads as _loads, recv_until
+
+class _CachedTimeFormatter(logging.Formatter):
+    """Formatter that runs strftime at most once per wall-clock second"""
+    def __init__(self, fmt: str):
+        super().__init__(fmt)
+        self._last_sec = None
+        self._last_str = ""
+    
+    def formatTime(self, record: logging.LogRecord, datefmt=None) -> str:
+        sec = int(record.created)
+        if sec != self._last_sec:
+            self._last_sec = sec
+            self._last_str = time.strftime(self.default_time_format, self.converter(sec))
+        return "%s,%03d" % (self._last_str, record.msecs)
+
+# Configure detailed logging on a dedicated handler
+_handler = logging.StreamHandler()
+_handler.setFormatter(_CachedTimeFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
 logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+logger.addHandler(_handler)
+logger.propagate = False
+
+# Name of the test running in the current task, used to tag interleaved logs
+_current_test = contextvars.ContextVar("current_test", default=None)
+
+class _TestNameFilter(logging.Filter):
+    """Prefix each record with the name of the test that emitted it"""
+    def filter(self, record: logging.LogRecord) -> bool:
+        test_name = _current_test.get()
+        if test_name:
+            record.msg = f"[{test_name}] {record.msg}"
+        return True
+
+logger.addFilter(_TestNameFilter())
+
+# uvloop when available; None keeps asyncio's default loop
+try:
+    import uvloop
+    _loop_factory = uvloop.new_event_loop
+except ImportError:
+    _loop_factory = None
+
+# Signaling fixtures are fixed, so serialize them once at import time; they go
+# out as text frames because the preview deployment may predate binary support
+OFFER_MESSAGE = {
+    "type": "offer",
+    "data": {
+        "sdp": "v=0\r\no=- 4611731400430051336 2 IN IP4 127.0.0.1\r\ns=-\r\nt=0 0\r\na=group:BUNDLE 0\r\na=extmap-allow-mixed\r\na=msid-semantic: WMS\r\nm=video 9 UDP/TLS/RTP/SAVPF 96 97 98 99 100 101 102 121 127 120 125 107 108 109 124 119 123 118 114 115 116\r\nc=IN IP4 0.0.0.0\r\na=rtcp:9 IN IP4 0.0.0.0\r\na=ice-ufrag:4ZcD\r\na=ice-pwd:2/1muCWoOi3uLifh0NuRHgpw\r\na=ice-options:trickle\r\na=fingerprint:sha-256 75:74:5A:A6:A4:E5:52:F4:A7:67:4C:01:C7:EE:91:3F:21:3D:A2:E3:53:7B:6F:30:86:F2:30:FF:A6:22:D2:04\r\na=setup:actpass\r\na=mid:0\r\na=extmap:1 urn:ietf:params:rtp-hdrext:toffset\r\na=extmap:2 http://www.webrtc.org/experiments/rtp-hdrext/abs-send-time\r\na=extmap:3 urn:3gpp:video-orientation\r\na=extmap:4 http://www.ietf.org/id/draft-holmer-rmcat-transport-wide-cc-extensions-01\r\na=extmap:5 http://www.webrtc.org/experiments/rtp-hdrext/playout-delay\r\na=extmap:6 http://www.webrtc.org/experiments/rtp-hdrext/video-content-type\r\na=extmap:7 http://www.webrtc.org/experiments/rtp-hdrext/video-timing\r\na=extmap:8 http://www.webrtc.org/experiments/rtp-hdrext/color-space\r\na=extmap:9 urn:ietf:params:rtp-hdrext:sdes:mid\r\na=extmap:10 urn:ietf:params:rtp-hdrext:sdes:rtp-stream-id\r\na=extmap:11 urn:ietf:params:rtp-hdrext:sdes:repaired-rtp-stream-id\r\na=sendrecv\r\na=msid:- \r\na=rtcp-mux\r\na=rtcp-rsize\r\na=rtpmap:96 VP8/90000\r\na=rtcp-fb:96 goog-remb\r\na=rtcp-fb:96 transport-cc\r\na=rtcp-fb:96 ccm fir\r\na=rtcp-fb:96 nack\r\na=rtcp-fb:96 nack pli\r\na=rtpmap:97 rtx/90000\r\na=fmtp:97 apt=96\r\n",
+        "type": "offer"
+    }
+}
+_OFFER_FRAME = _dumps(OFFER_MESSAGE)
+
+ANSWER_MESSAGE = {
+    "type": "answer",
+    "data": {
+        "sdp": "v=0\r\no=- 1234567890 2 IN IP4 127.0.0.1\r\ns=-\r\nt=0 0\r\na=group:BUNDLE 0\r\na=extmap-allow-mixed\r\na=msid-semantic: WMS\r\nm=video 9 UDP/TLS/RTP/SAVPF 96 97 98 99 100 101 102 121 127 120 125 107 108 109 124 119 123 118 114 115 116\r\nc=IN IP4 0.0.0.0\r\na=rtcp:9 IN IP4 0.0.0.0\r\na=ice-ufrag:abcd\r\na=ice-pwd:efghijklmnopqrstuvwxyz123456\r\na=ice-options:trickle\r\na=fingerprint:sha-256 AA:BB:CC:DD:EE:FF:00:11:22:33:44:55:66:77:88:99:AA:BB:CC:DD:EE:FF:00:11:22:33:44:55:66:77:88:99\r\na=setup:active\r\na=mid:0\r\na=sendrecv\r\na=rtcp-mux\r\na=rtcp-rsize\r\na=rtpmap:96 VP8/90000\r\n",
+        "type": "answer"
+    }
+}
+_ANSWER_FRAME = _dumps(ANSWER_MESSAGE)
+
+@dataclass(slots=True, frozen=True)
+class IceCandidate:
+    """One trickled ICE candidate as carried in signaling messages"""
+    candidate: str
+    sdpMLineIndex: int
+    sdpMid: str
+
+PHONE_CANDIDATES = (
+    IceCandidate(
+        "candidate:842163049 1 udp 2122260223 192.168.1.100 54400 typ host generation 0 ufrag 4ZcD network-cost 999",
+        0, "0"
+    ),
+    IceCandidate(
+        "candidate:842163049 1 udp 1677729535 192.168.1.100 54400 typ srflx raddr 192.168.1.100 rport 54400 generation 0 ufrag 4ZcD network-cost 999",
+        0, "0"
+    ),
+)
+LAPTOP_CANDIDATES = (
+    IceCandidate(
+        "candidate:987654321 1 udp 1677729535 10.0.0.50 45678 typ host generation 0 ufrag abcd network-cost 50",
+        0, "0"
+    ),
+)
+
+# One ice_candidate message per candidate, as the frontend trickles them.
+# A batched {"type": "ice_candidates", "data": [...]} message would save a
+# frame per candidate, but neither the server nor the frontend speaks it.
+ICE_PHONE_MESSAGES = tuple({"type": "ice_candidate", "data": asdict(c)} for c in PHONE_CANDIDATES)
+_ICE_PHONE_FRAMES = tuple(_dumps(m) for m in ICE_PHONE_MESSAGES)
+
+ICE_LAPTOP_MESSAGES = tuple({"type": "ice_candidate", "data": asdict(c)} for c in LAPTOP_CANDIDATES)
+_ICE_LAPTOP_FRAMES = tuple(_dumps(m) for m in ICE_LAPTOP_MESSAGES)
+
+BROADCAST_OFFER_MESSAGE = {
+    "type": "offer",
+    "data": {
+        "sdp": "v=0\r\no=- 123456789 2 IN IP4 127.0.0.1\r\ns=-\r\nt=0 0\r\n",
+        "type": "offer"
+    }
+}
+_BROADCAST_OFFER_FRAME = _dumps(BROADCAST_OFFER_MESSAGE)
+
+# Plain blue 300x300 frame, JPEG-encoded offline
+_TEST_IMAGE_B64 = (
+    "data:image/jpeg;base64,"
+    "/9j/4AAQSkZJRgABAQAAAQABAAD/2wBDAAgGBgcGBQgHBwcJCQgKDBQNDAsLDBkSEw8UHRofHh0a"
+    "HBwgJC4nICIsIxwcKDcpLDAxNDQ0Hyc5PTgyPC4zNDL/2wBDAQkJCQwLDBgNDRgyIRwhMjIyMjIy"
+    "MjIyMjIyMjIyMjIyMjIyMjIyMjIyMjIyMjIyMjIyMjIyMjIyMjIyMjIyMjL/wAARCAEsASwDASIA"
+    "AhEBAxEB/8QAFQABAQAAAAAAAAAAAAAAAAAAAAf/xAAUEAEAAAAAAAAAAAAAAAAAAAAA/8QAFgEB"
+    "AQEAAAAAAAAAAAAAAAAAAAUH/8QAFBEBAAAAAAAAAAAAAAAAAAAAAP/aAAwDAQACEQMRAD8AjgDc"
+    "UwAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA"
+    "AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA"
+    "AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA"
+    "AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA"
+    "AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA"
+    "AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA"
+    "AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA"
+    "AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA"
+    "AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA"
+    "AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAB//2Q=="
+)
+
+# Only frame_id and capture_ts change between detection frames
+_DETECTION_TEMPLATE = {"type": "detection_frame", "frame_data": _TEST_IMAGE_B64}
 
 # Test configuration
 BACKEND_URL = "https://webrtc-answer-fix.preview.emergentagent.com"
 WS_BASE = BACKEND_URL.replace("https://", "wss://").replace("http://", "ws://")
 
+# One TLS context for every connection, so CA certificates are loaded once
+if WS_BASE.startswith("wss://"):
+    _SSL_CTX = ssl.create_default_context()
+    _SSL_CTX.set_ciphers("ECDHE+AESGCM")
+else:
+    _SSL_CTX = None
+
+# No keepalive pings; tests are short-lived
+WS_CONNECT_OPTIONS = {**_BASE_WS_OPTIONS, "ping_interval": None, "open_timeout": 10, "ssl": _SSL_CTX}
+
+# One random seed per run keeps room IDs unique without drawing entropy per test
+_ROOM_SEED = secrets.token_hex(4)
+_ROOM_COUNTER = itertools.count()
+
+# The server always writes "type" as the first key, so it sits in the frame's head
+_TYPE_RE = re.compile(r'"type"\s*:\s*"([^"]+)"')
+
+def _peek_type(raw: Union[str, bytes]) -> Optional[str]:
+    """Read a frame's message type without parsing the whole JSON body"""
+    head = raw[:256]
+    if isinstance(head, bytes):
+        head = head.decode(errors="ignore")
+    match = _TYPE_RE.search(head)
+    return match.group(1) if match else None
+
+def _preview_text(preview: Union[str, bytes, None]) -> str:
+    """Render a logged frame slice; parsed messages carry no preview"""
+    if preview is None:
+        return "-"
+    if isinstance(preview, bytes):
+        preview = preview.decode(errors="ignore")
+    return preview + "..."
+
+# Background close tasks, held so they are not garbage-collected mid-close
+_closing = set()
+
+@asynccontextmanager
+async def _ws(url: str):
+    """Connect with the shared options; the close handshake runs in the background"""
+    ws = await websockets.connect(url, **WS_CONNECT_OPTIONS)
+    try:
+        yield ws
+    finally:
+        task = asyncio.create_task(ws.close(code=1000))
+        _closing.add(task)
+        task.add_done_callback(_closing.discard)
+
+async def _await_joins(ws, count: int, timeout: float = 5.0):
+    """Wait until `count` user_joined notifications have arrived on ws"""
+    async with asyncio.timeout(timeout):
+        for _ in range(count):
+            await recv_until(ws, "user_joined", timeout=timeout)
+
 class WebRTCSignalingDebugger:
     def __init__(self):
         self.test_results = {}
-        self.message_log = []
+        # (monotonic_ns, direction, client, type, preview); oldest entries fall off
+        self.message_log = deque(maxlen=2048)
         
-    def log_message(self, direction: str, client: str, message: dict):
-        """Log WebSocket messages for debugging"""
-        timestamp = time.time()
-        log_entry = {
-            "timestamp": timestamp,
-            "direction": direction,  # "sent" or "received"
-            "client": client,
-            "message": message
-        }
-        self.message_log.append(log_entry)
-        logger.info(f"[{client}] {direction.upper()}: {message.get('type', 'unknown')} - {message}")
+    def log_message(self, direction: str, client: str, message: Union[dict, str, bytes]):
+        """Log WebSocket messages for debugging; raw frames are logged unparsed"""
+        # Keep only a slice of raw frames and nothing of parsed messages, so
+        # SDP and frame payloads are neither serialized nor held alive here
+        if isinstance(message, dict):
+            message_type = message.get('type', 'unknown')
+            preview = None
+        else:
+            message_type = _peek_type(message) or 'unknown'
+            preview = message[:100]
+        self.message_log.append((time.monotonic_ns(), direction, client, message_type, preview))
+        logger.info("[%s] %s: %s", client, direction.upper(), message_type)
     
     async def test_websocket_connection(self) -> bool:
         """Test basic WebSocket connection to signaling server"""
@@ -46,13 +230,13 @@ class WebRTCSignalingDebugger:
         logger.info("TEST 1: WebSocket Connection")
         logger.info("=" * 60)
         
-        test_room_id = f"debug_room_{uuid.uuid4().hex[:8]}"
+        test_room_id = f"debug_room_{_ROOM_SEED}_{next(_ROOM_COUNTER)}"
         ws_url = f"{WS_BASE}/ws/{test_room_id}"
         
         try:
             logger.info(f"Attempting WebSocket connection to: {ws_url}")
             
-            async with websockets.connect(ws_url, timeout=10) as websocket:
+            async with _ws(ws_url) as websocket:
                 logger.info("✓ WebSocket connection established successfully")
                 
                 # Test basic ping-pong
@@ -61,14 +245,15 @@ class WebRTCSignalingDebugger:
                 
                 # Wait for any initial messages (user_joined)
                 try:
-                    initial_message = await asyncio.wait_for(websocket.recv(), timeout=2.0)
-                    data = json.loads(initial_message)
-                    self.log_message("received", "client1", data)
+                    async with asyncio.timeout(2.0):
+                        initial_message = await websocket.recv()
+                    self.log_message("received", "client1", initial_message)
                     
-                    if data.get("type") == "user_joined":
+                    message_type = _peek_type(initial_message)
+                    if message_type == "user_joined":
                         logger.info("✓ Received user_joined notification")
                     else:
-                        logger.warning(f"⚠ Unexpected initial message: {data.get('type')}")
+                        logger.warning(f"⚠ Unexpected initial message: {message_type}")
                         
                 except asyncio.TimeoutError:
                     logger.info("ℹ No initial messages received (this is okay)")
@@ -85,12 +270,12 @@ class WebRTCSignalingDebugger:
         logger.info("TEST 2: Room Management & User Tracking")
         logger.info("=" * 60)
         
-        test_room_id = f"debug_room_{uuid.uuid4().hex[:8]}"
+        test_room_id = f"debug_room_{_ROOM_SEED}_{next(_ROOM_COUNTER)}"
         ws_url = f"{WS_BASE}/ws/{test_room_id}"
         
         try:
             # Connect two clients to the same room
-            async with websockets.connect(ws_url) as ws1, websockets.connect(ws_url) as ws2:
+            async with _ws(ws_url) as ws1, _ws(ws_url) as ws2:
                 logger.info("✓ Two clients connected to the same room")
                 
                 # Clear initial messages
@@ -98,12 +283,13 @@ class WebRTCSignalingDebugger:
                 
                 # Client 1 requests room users
                 get_users_msg = {"type": "get_room_users"}
-                await ws1.send(json.dumps(get_users_msg))
+                await ws1.send(_dumps(get_users_msg))
                 self.log_message("sent", "client1", get_users_msg)
                 
                 # Wait for room users response
-                response = await asyncio.wait_for(ws1.recv(), timeout=5.0)
-                data = json.loads(response)
+                async with asyncio.timeout(5.0):
+                    response = await ws1.recv()
+                data = _loads(response)
                 self.log_message("received", "client1", data)
                 
                 if data.get("type") == "room_users":
@@ -131,45 +317,31 @@ class WebRTCSignalingDebugger:
         logger.info("TEST 3: WebRTC Offer→Answer→ICE Candidate Flow")
         logger.info("=" * 60)
         
-        test_room_id = f"debug_room_{uuid.uuid4().hex[:8]}"
+        test_room_id = f"debug_room_{_ROOM_SEED}_{next(_ROOM_COUNTER)}"
         ws_url = f"{WS_BASE}/ws/{test_room_id}"
         
         try:
             # Connect two clients (phone and laptop simulation)
-            async with websockets.connect(ws_url) as phone_ws, websockets.connect(ws_url) as laptop_ws:
+            async with _ws(ws_url) as phone_ws, _ws(ws_url) as laptop_ws:
                 logger.info("✓ Phone and Laptop clients connected")
                 
-                # Wait for connection setup and clear initial messages
-                await asyncio.sleep(1)
-                try:
-                    while True:
-                        await asyncio.wait_for(phone_ws.recv(), timeout=0.1)
-                except asyncio.TimeoutError:
-                    pass
-                try:
-                    while True:
-                        await asyncio.wait_for(laptop_ws.recv(), timeout=0.1)
-                except asyncio.TimeoutError:
-                    pass
+                # Ready once the phone has seen the laptop join; then clear
+                # anything else queued on both sockets together
+                await _await_joins(phone_ws, 1)
+                await asyncio.gather(drain(phone_ws, 0.1), drain(laptop_ws, 0.1))
                 
                 # Step 1: Phone sends WebRTC offer
                 logger.info("Step 1: Phone sending WebRTC offer...")
-                offer_message = {
-                    "type": "offer",
-                    "data": {
-                        "sdp": "v=0\r\no=- 4611731400430051336 2 IN IP4 127.0.0.1\r\ns=-\r\nt=0 0\r\na=group:BUNDLE 0\r\na=extmap-allow-mixed\r\na=msid-semantic: WMS\r\nm=video 9 UDP/TLS/RTP/SAVPF 96 97 98 99 100 101 102 121 127 120 125 107 108 109 124 119 123 118 114 115 116\r\nc=IN IP4 0.0.0.0\r\na=rtcp:9 IN IP4 0.0.0.0\r\na=ice-ufrag:4ZcD\r\na=ice-pwd:2/1muCWoOi3uLifh0NuRHgpw\r\na=ice-options:trickle\r\na=fingerprint:sha-256 75:74:5A:A6:A4:E5:52:F4:A7:67:4C:01:C7:EE:91:3F:21:3D:A2:E3:53:7B:6F:30:86:F2:30:FF:A6:22:D2:04\r\na=setup:actpass\r\na=mid:0\r\na=extmap:1 urn:ietf:params:rtp-hdrext:toffset\r\na=extmap:2 http://www.webrtc.org/experiments/rtp-hdrext/abs-send-time\r\na=extmap:3 urn:3gpp:video-orientation\r\na=extmap:4 http://www.ietf.org/id/draft-holmer-rmcat-transport-wide-cc-extensions-01\r\na=extmap:5 http://www.webrtc.org/experiments/rtp-hdrext/playout-delay\r\na=extmap:6 http://www.webrtc.org/experiments/rtp-hdrext/video-content-type\r\na=extmap:7 http://www.webrtc.org/experiments/rtp-hdrext/video-timing\r\na=extmap:8 http://www.webrtc.org/experiments/rtp-hdrext/color-space\r\na=extmap:9 urn:ietf:params:rtp-hdrext:sdes:mid\r\na=extmap:10 urn:ietf:params:rtp-hdrext:sdes:rtp-stream-id\r\na=extmap:11 urn:ietf:params:rtp-hdrext:sdes:repaired-rtp-stream-id\r\na=sendrecv\r\na=msid:- \r\na=rtcp-mux\r\na=rtcp-rsize\r\na=rtpmap:96 VP8/90000\r\na=rtcp-fb:96 goog-remb\r\na=rtcp-fb:96 transport-cc\r\na=rtcp-fb:96 ccm fir\r\na=rtcp-fb:96 nack\r\na=rtcp-fb:96 nack pli\r\na=rtpmap:97 rtx/90000\r\na=fmtp:97 apt=96\r\n",
-                        "type": "offer"
-                    }
-                }
                 
-                await phone_ws.send(json.dumps(offer_message))
-                self.log_message("sent", "phone", offer_message)
+                await phone_ws.send(_OFFER_FRAME)
+                self.log_message("sent", "phone", OFFER_MESSAGE)
                 
                 # Step 2: Laptop should receive the offer
                 logger.info("Step 2: Waiting for laptop to receive offer...")
                 try:
-                    laptop_response = await asyncio.wait_for(laptop_ws.recv(), timeout=10.0)
-                    laptop_data = json.loads(laptop_response)
+                    async with asyncio.timeout(10.0):
+                        laptop_response = await laptop_ws.recv()
+                    laptop_data = _loads(laptop_response)
                     self.log_message("received", "laptop", laptop_data)
                     
                     if laptop_data.get("type") == "offer":
@@ -187,22 +359,16 @@ class WebRTCSignalingDebugger:
                 
                 # Step 3: Laptop sends answer back
                 logger.info("Step 3: Laptop sending WebRTC answer...")
-                answer_message = {
-                    "type": "answer",
-                    "data": {
-                        "sdp": "v=0\r\no=- 1234567890 2 IN IP4 127.0.0.1\r\ns=-\r\nt=0 0\r\na=group:BUNDLE 0\r\na=extmap-allow-mixed\r\na=msid-semantic: WMS\r\nm=video 9 UDP/TLS/RTP/SAVPF 96 97 98 99 100 101 102 121 127 120 125 107 108 109 124 119 123 118 114 115 116\r\nc=IN IP4 0.0.0.0\r\na=rtcp:9 IN IP4 0.0.0.0\r\na=ice-ufrag:abcd\r\na=ice-pwd:efghijklmnopqrstuvwxyz123456\r\na=ice-options:trickle\r\na=fingerprint:sha-256 AA:BB:CC:DD:EE:FF:00:11:22:33:44:55:66:77:88:99:AA:BB:CC:DD:EE:FF:00:11:22:33:44:55:66:77:88:99\r\na=setup:active\r\na=mid:0\r\na=sendrecv\r\na=rtcp-mux\r\na=rtcp-rsize\r\na=rtpmap:96 VP8/90000\r\n",
-                        "type": "answer"
-                    }
-                }
                 
-                await laptop_ws.send(json.dumps(answer_message))
-                self.log_message("sent", "laptop", answer_message)
+                await laptop_ws.send(_ANSWER_FRAME)
+                self.log_message("sent", "laptop", ANSWER_MESSAGE)
                 
                 # Step 4: Phone should receive the answer
                 logger.info("Step 4: Waiting for phone to receive answer...")
                 try:
-                    phone_response = await asyncio.wait_for(phone_ws.recv(), timeout=10.0)
-                    phone_data = json.loads(phone_response)
+                    async with asyncio.timeout(10.0):
+                        phone_response = await phone_ws.recv()
+                    phone_data = _loads(phone_response)
                     self.log_message("received", "phone", phone_data)
                     
                     if phone_data.get("type") == "answer":
@@ -220,67 +386,51 @@ class WebRTCSignalingDebugger:
                 # Step 5: Test ICE candidate exchange
                 logger.info("Step 5: Testing ICE candidate exchange...")
                 
-                # Phone sends ICE candidate
-                ice_candidate_message = {
-                    "type": "ice_candidate",
-                    "data": {
-                        "candidate": "candidate:842163049 1 udp 1677729535 192.168.1.100 54400 typ srflx raddr 192.168.1.100 rport 54400 generation 0 ufrag 4ZcD network-cost 999",
-                        "sdpMLineIndex": 0,
-                        "sdpMid": "0"
-                    }
-                }
-                
-                await phone_ws.send(json.dumps(ice_candidate_message))
-                self.log_message("sent", "phone", ice_candidate_message)
+                # Phone trickles its ICE candidates
+                for message, raw in zip(ICE_PHONE_MESSAGES, _ICE_PHONE_FRAMES):
+                    await phone_ws.send(raw)
+                    self.log_message("sent", "phone", message)
                 
-                # Laptop should receive ICE candidate
+                # Laptop should receive each ICE candidate
                 try:
-                    laptop_ice_response = await asyncio.wait_for(laptop_ws.recv(), timeout=5.0)
-                    laptop_ice_data = json.loads(laptop_ice_response)
-                    self.log_message("received", "laptop", laptop_ice_data)
-                    
-                    if laptop_ice_data.get("type") == "ice_candidate":
+                    for _ in ICE_PHONE_MESSAGES:
+                        async with asyncio.timeout(5.0):
+                            laptop_ice_response = await laptop_ws.recv()
+                        laptop_ice_data = _loads(laptop_ice_response)
+                        self.log_message("received", "laptop", laptop_ice_data)
+                        
+                        if laptop_ice_data.get("type") != "ice_candidate":
+                            logger.error(f"✗ Expected ice_candidate, got: {laptop_ice_data.get('type')}")
+                            return False
                         logger.info("✓ Laptop received ICE candidate successfully")
                         logger.info(f"  - Candidate: {laptop_ice_data.get('data', {}).get('candidate', '')[:50]}...")
+                except asyncio.TimeoutError:
+                    logger.error("✗ Laptop did not receive ICE candidate")
+                    return False
+                
+                # Send ICE candidates back from laptop
+                for message, raw in zip(ICE_LAPTOP_MESSAGES, _ICE_LAPTOP_FRAMES):
+                    await laptop_ws.send(raw)
+                    self.log_message("sent", "laptop", message)
+                
+                # Phone should receive laptop's ICE candidates
+                try:
+                    for _ in ICE_LAPTOP_MESSAGES:
+                        async with asyncio.timeout(5.0):
+                            phone_ice_response = await phone_ws.recv()
+                        phone_ice_data = _loads(phone_ice_response)
+                        self.log_message("received", "phone", phone_ice_data)
                         
-                        # Send ICE candidate back from laptop
-                        laptop_ice_message = {
-                            "type": "ice_candidate",
-                            "data": {
-                                "candidate": "candidate:987654321 1 udp 1677729535 10.0.0.50 45678 typ host generation 0 ufrag abcd network-cost 50",
-                                "sdpMLineIndex": 0,
-                                "sdpMid": "0"
-                            }
-                        }
-                        
-                        await laptop_ws.send(json.dumps(laptop_ice_message))
-                        self.log_message("sent", "laptop", laptop_ice_message)
-                        
-                        # Phone should receive laptop's ICE candidate
-                        try:
-                            phone_ice_response = await asyncio.wait_for(phone_ws.recv(), timeout=5.0)
-                            phone_ice_data = json.loads(phone_ice_response)
-                            self.log_message("received", "phone", phone_ice_data)
-                            
-                            if phone_ice_data.get("type") == "ice_candidate":
-                                logger.info("✓ Phone received ICE candidate from laptop")
-                                logger.info("✅ COMPLETE WebRTC signaling flow successful!")
-                                return True
-                            else:
-                                logger.error(f"✗ Expected ice_candidate, got: {phone_ice_data.get('type')}")
-                                return False
-                                
-                        except asyncio.TimeoutError:
-                            logger.error("✗ Phone did not receive ICE candidate from laptop")
+                        if phone_ice_data.get("type") != "ice_candidate":
+                            logger.error(f"✗ Expected ice_candidate, got: {phone_ice_data.get('type')}")
                             return False
-                            
-                    else:
-                        logger.error(f"✗ Expected ice_candidate, got: {laptop_ice_data.get('type')}")
-                        return False
-                        
                 except asyncio.TimeoutError:
-                    logger.error("✗ Laptop did not receive ICE candidate")
+                    logger.error("✗ Phone did not receive ICE candidate from laptop")
                     return False
+                
+                logger.info("✓ Phone received ICE candidates from laptop")
+                logger.info("✅ COMPLETE WebRTC signaling flow successful!")
+                return True
                     
         except Exception as e:
             logger.error(f"✗ WebRTC signaling flow test failed: {e}")
@@ -292,42 +442,29 @@ class WebRTCSignalingDebugger:
         logger.info("TEST 4: Detection Frame Processing via WebSocket")
         logger.info("=" * 60)
         
-        test_room_id = f"debug_room_{uuid.uuid4().hex[:8]}"
+        test_room_id = f"debug_room_{_ROOM_SEED}_{next(_ROOM_COUNTER)}"
         ws_url = f"{WS_BASE}/ws/{test_room_id}"
         
         try:
-            async with websockets.connect(ws_url) as websocket:
+            async with _ws(ws_url) as websocket:
                 logger.info("✓ Connected for detection frame testing")
                 
-                # Create a simple test image (base64 encoded)
-                import base64
-                from PIL import Image
-                import io
-                
-                # Create test image
-                image = Image.new('RGB', (300, 300), color='blue')
-                buffer = io.BytesIO()
-                image.save(buffer, format='JPEG')
-                image_data = base64.b64encode(buffer.getvalue()).decode()
-                test_image_b64 = f"data:image/jpeg;base64,{image_data}"
-                
                 # Send detection frame
-                frame_id = str(uuid.uuid4())
                 detection_message = {
-                    "type": "detection_frame",
-                    "frame_id": frame_id,
-                    "frame_data": test_image_b64,
+                    **_DETECTION_TEMPLATE,
+                    "frame_id": str(uuid.uuid4()),
                     "capture_ts": time.time()
                 }
                 
                 logger.info("Sending detection frame...")
-                await websocket.send(json.dumps(detection_message))
+                await websocket.send(_dumps(detection_message))
                 self.log_message("sent", "client", detection_message)
                 
                 # Wait for detection result
                 try:
-                    result = await asyncio.wait_for(websocket.recv(), timeout=15.0)
-                    result_data = json.loads(result)
+                    async with asyncio.timeout(15.0):
+                        result = await websocket.recv()
+                    result_data = _loads(result)
                     self.log_message("received", "client", result_data)
                     
                     if result_data.get("type") == "detection_result":
@@ -357,85 +494,73 @@ class WebRTCSignalingDebugger:
             logger.error(f"✗ Detection frame processing test failed: {e}")
             return False
     
+    async def _recv_broadcast_offers(self, ws, client: str, expected: int) -> int:
+        """Count broadcast offers received by one client of the multi-client test"""
+        label = client.replace("client", "Client ")
+        received = 0
+        try:
+            async with asyncio.timeout(5.0):
+                while received < expected:
+                    raw = await ws.recv()
+                    self.log_message("received", client, raw)
+                    
+                    # Only the type is checked, so the SDP body is never parsed
+                    message_type = _peek_type(raw)
+                    if message_type != "offer":
+                        logger.warning(f"⚠ {label} got unexpected message: {message_type}")
+                        continue
+                    received += 1
+        except asyncio.TimeoutError:
+            logger.error(f"✗ {label} received {received}/{expected} broadcast offers")
+            return received
+        
+        logger.info(f"✓ {label} received {received} broadcast offers")
+        return received
+    
     async def test_multiple_clients_signaling(self) -> bool:
         """Test signaling with multiple clients in the same room"""
         logger.info("=" * 60)
         logger.info("TEST 5: Multiple Clients Signaling")
         logger.info("=" * 60)
         
-        test_room_id = f"debug_room_{uuid.uuid4().hex[:8]}"
+        test_room_id = f"debug_room_{_ROOM_SEED}_{next(_ROOM_COUNTER)}"
         ws_url = f"{WS_BASE}/ws/{test_room_id}"
         
         try:
             # Connect 3 clients to simulate a multi-user scenario
-            async with websockets.connect(ws_url) as ws1, \
-                       websockets.connect(ws_url) as ws2, \
-                       websockets.connect(ws_url) as ws3:
+            async with _ws(ws_url) as ws1, \
+                       _ws(ws_url) as ws2, \
+                       _ws(ws_url) as ws3:
                 
                 logger.info("✓ Three clients connected to the same room")
                 
-                # Wait for connections to stabilize
-                await asyncio.sleep(1)
-                
-                # Clear initial messages
-                for ws in [ws1, ws2, ws3]:
-                    try:
-                        while True:
-                            await asyncio.wait_for(ws.recv(), timeout=0.1)
-                    except asyncio.TimeoutError:
-                        pass
-                
-                # Client 1 broadcasts an offer
-                broadcast_offer = {
-                    "type": "offer",
-                    "data": {
-                        "sdp": "v=0\r\no=- 123456789 2 IN IP4 127.0.0.1\r\ns=-\r\nt=0 0\r\n",
-                        "type": "offer"
-                    }
-                }
-                
-                await ws1.send(json.dumps(broadcast_offer))
-                self.log_message("sent", "client1", broadcast_offer)
-                logger.info("Client 1 sent broadcast offer")
-                
-                # Both client 2 and client 3 should receive the offer
-                received_count = 0
-                
-                # Check client 2
-                try:
-                    response2 = await asyncio.wait_for(ws2.recv(), timeout=5.0)
-                    data2 = json.loads(response2)
-                    self.log_message("received", "client2", data2)
-                    
-                    if data2.get("type") == "offer":
-                        logger.info("✓ Client 2 received broadcast offer")
-                        received_count += 1
-                    else:
-                        logger.warning(f"⚠ Client 2 got unexpected message: {data2.get('type')}")
-                        
-                except asyncio.TimeoutError:
-                    logger.error("✗ Client 2 did not receive broadcast offer")
-                
-                # Check client 3
-                try:
-                    response3 = await asyncio.wait_for(ws3.recv(), timeout=5.0)
-                    data3 = json.loads(response3)
-                    self.log_message("received", "client3", data3)
-                    
-                    if data3.get("type") == "offer":
-                        logger.info("✓ Client 3 received broadcast offer")
-                        received_count += 1
-                    else:
-                        logger.warning(f"⚠ Client 3 got unexpected message: {data3.get('type')}")
-                        
-                except asyncio.TimeoutError:
-                    logger.error("✗ Client 3 did not receive broadcast offer")
-                
-                if received_count >= 2:
+                # Ready once every earlier client has seen the later ones join
+                await asyncio.gather(_await_joins(ws1, 2), _await_joins(ws2, 1))
+                
+                # Clear any other initial messages on all clients at once
+                await asyncio.gather(*(drain(ws, 0.1) for ws in (ws1, ws2, ws3)))
+                
+                # Every client broadcasts an offer at the same time
+                clients = [("client1", ws1), ("client2", ws2), ("client3", ws3)]
+                await asyncio.gather(*(ws.send(_BROADCAST_OFFER_FRAME) for _, ws in clients))
+                for client, _ in clients:
+                    self.log_message("sent", client, BROADCAST_OFFER_MESSAGE)
+                logger.info("All 3 clients sent broadcast offers")
+                
+                # Each client should receive the other two offers; wait on all of them at once
+                expected = len(clients) - 1
+                results = await asyncio.gather(
+                    *(self._recv_broadcast_offers(ws, client, expected) for client, ws in clients),
+                    return_exceptions=True
+                )
+                received_count = sum(result for result in results if isinstance(result, int))
+                total_expected = expected * len(clients)
+                
+                if received_count >= total_expected:
                     logger.info("✅ Multiple clients signaling working correctly")
                     return True
                 else:
-                    logger.error(f"✗ Only {received_count}/2 clients received the broadcast")
+                    logger.error(f"✗ Only {received_count}/{total_expected} broadcast offers were delivered")
                     return False
                     
         except Exception as e:
@@ -448,13 +573,21 @@ class WebRTCSignalingDebugger:
         logger.info("DETAILED MESSAGE LOG")
         logger.info("=" * 60)
         
-        for i, entry in enumerate(self.message_log):
-            timestamp = entry["timestamp"]
-            direction = entry["direction"]
-            client = entry["client"]
-            message = entry["message"]
-            
-            logger.info(f"[{i+1:02d}] {timestamp:.3f} | {client:>8} | {direction:>8} | {message.get('type', 'unknown'):>15} | {str(message)[:100]}...")
+        # Monotonic timestamps only mean something relative to each other,
+        # so show seconds since the first logged message
+        first_ts = self.message_log[0][0] if self.message_log else 0
+        
+        # Format every row up front and hand the logger a single record
+        logger.info("\n".join(
+            "[%02d] +%.3fs | %8s | %8s | %15s | %s" % (i, (timestamp - first_ts) / 1e9, client, direction, message_type, _preview_text(preview))
+            for i, (timestamp, direction, client, message_type, preview) in enumerate(self.message_log, 1)
+        ))
+    
+    async def _run_named(self, test_name: str, test_func) -> bool:
+        """Run one test with its name attached to every log line it emits"""
+        _current_test.set(test_name)
+        logger.info(f"\n🧪 Running: {test_name}")
+        return await test_func()
     
     async def run_comprehensive_debug_tests(self) -> Dict[str, bool]:
         """Run all WebRTC signaling debug tests"""
@@ -471,21 +604,25 @@ class WebRTCSignalingDebugger:
         
         results = {}
         
-        for test_name, test_func in tests:
-            try:
-                logger.info(f"\n🧪 Running: {test_name}")
-                result = await test_func()
-                results[test_name] = result
-                
-                status = "✅ PASSED" if result else "❌ FAILED"
-                logger.info(f"Result: {status}")
-                
-                if not result:
-                    logger.error(f"❌ CRITICAL ISSUE DETECTED in {test_name}")
-                    
-            except Exception as e:
-                logger.error(f"❌ {test_name} failed with exception: {e}")
+        # Each test uses its own room, so run them all at once
+        gathered = await asyncio.gather(
+            *(self._run_named(test_name, test_func) for test_name, test_func in tests),
+            return_exceptions=True
+        )
+        
+        for (test_name, _), result in zip(tests, gathered):
+            if isinstance(result, BaseException):
+                logger.error(f"❌ {test_name} failed with exception: {result}")
                 results[test_name] = False
+                continue
+            
+            results[test_name] = result
+            
+            status = "✅ PASSED" if result else "❌ FAILED"
+            logger.info(f"{test_name} result: {status}")
+            
+            if not result:
+                logger.error(f"❌ CRITICAL ISSUE DETECTED in {test_name}")
         
         # Print summary
         logger.info("\n" + "=" * 80)
@@ -512,6 +649,9 @@ class WebRTCSignalingDebugger:
         if self.message_log:
             self.print_message_log()
         
+        # Let the detached close handshakes finish before the loop shuts down
+        await asyncio.gather(*_closing, return_exceptions=True)
+        
         return results
 
 async def main():
@@ -523,7 +663,8 @@ async def main():
     return results
 
 if __name__ == "__main__":
-    results = asyncio.run(main())
+    with asyncio.Runner(loop_factory=_loop_factory) as runner:
+        results = runner.run(main())
     
     # Determine exit code
     all_passed = all(results.values())
@@ -6,14 +6,22 @@ Comprehensive testing of HTTP signaling API endpoints and WebRTC flow
 
 import asyncio
 import aiohttp
-import json
-import base64
+# pybase64 is a SIMD drop-in for the stdlib codec when installed
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
 import time
 import uuid
-from PIL import Image
-import io
+from secrets import token_hex
+import itertools
+from functools import lru_cache
+import cv2
+import numpy as np
 import logging
-from typing import Dict, List, Any
+from typing import Callable, Dict, List, Any, Optional
+
+from signaling_common import dumps_text, loads as _loads
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -23,45 +31,139 @@ logger = logging.getLogger(__name__)
 BACKEND_URL = "https://webrtc-answer-fix.preview.emergentagent.com"
 API_BASE = f"{BACKEND_URL}/api"
 
+# FastAPI serializes compactly and keeps the endpoint's key order
+_EMPTY_POLL_PREFIX = b'{"messages":[]'
+
+def _poll_delays():
+    """Backoff between message polls: quick retries first, then a steady 200ms"""
+    return itertools.chain((0.01, 0.02, 0.05, 0.1), itertools.repeat(0.2))
+
+# Fixed SDP bodies; only the offer's msid changes per call
+_SDP_OFFER_TMPL = "v=0\r\no=- 4611731400430051336 2 IN IP4 127.0.0.1\r\ns=-\r\nt=0 0\r\na=group:BUNDLE 0\r\na=extmap-allow-mixed\r\na=msid-semantic: WMS\r\nm=video 9 UDP/TLS/RTP/SAVPF 96 97 98 99 100 101 102 121 127 120 125 107 108 109 124 119 123 118 114 115 116\r\nc=IN IP4 0.0.0.0\r\na=rtcp:9 IN IP4 0.0.0.0\r\na=ice-ufrag:4ZcD\r\na=ice-pwd:2/1muCWoOi3uLifh4d2u6QgbvJRs\r\na=ice-options:trickle\r\na=fingerprint:sha-256 75:74:5A:A6:A4:E5:52:F4:A7:67:4C:01:C7:EE:91:3F:21:3D:A2:E3:53:7B:6F:30:86:F2:30:FF:A6:22:D2:04\r\na=setup:actpass\r\na=mid:0\r\na=extmap:1 urn:ietf:params:rtp-hdrext:toffset\r\na=extmap:2 http://www.webrtc.org/experiments/rtp-hdrext/abs-send-time\r\na=extmap:3 urn:3gpp:video-orientation\r\na=extmap:4 http://www.ietf.org/id/draft-holmer-rmcat-transport-wide-cc-extensions-01\r\na=extmap:5 http://www.webrtc.org/experiments/rtp-hdrext/playout-delay\r\na=extmap:6 http://www.webrtc.org/experiments/rtp-hdrext/video-content-type\r\na=extmap:7 http://www.webrtc.org/experiments/rtp-hdrext/video-timing\r\na=extmap:8 http://www.webrtc.org/experiments/rtp-hdrext/color-space\r\na=extmap:9 urn:ietf:params:rtp-hdrext:sdes:mid\r\na=extmap:10 urn:ietf:params:rtp-hdrext:sdes:rtp-stream-id\r\na=extmap:11 urn:ietf:params:rtp-hdrext:sdes:repaired-rtp-stream-id\r\na=sendrecv\r\na=msid:- {msid}\r\na=rtcp-mux\r\na=rtcp-rsize\r\na=rtpmap:96 VP8/90000\r\na=rtcp-fb:96 goog-remb\r\na=rtcp-fb:96 transport-cc\r\na=rtcp-fb:96 ccm fir\r\na=rtcp-fb:96 nack\r\na=rtcp-fb:96 nack pli\r\na=ssrc:1001 cname:4TOk42mSjMCkjqMp\r\n"
+_SDP_ANSWER = "v=0\r\no=- 1234567890123456789 2 IN IP4 127.0.0.1\r\ns=-\r\nt=0 0\r\na=group:BUNDLE 0\r\na=extmap-allow-mixed\r\na=msid-semantic: WMS\r\nm=video 9 UDP/TLS/RTP/SAVPF 96\r\nc=IN IP4 0.0.0.0\r\na=rtcp:9 IN IP4 0.0.0.0\r\na=ice-ufrag:abcd\r\na=ice-pwd:1234567890123456789012\r\na=ice-options:trickle\r\na=fingerprint:sha-256 AA:BB:CC:DD:EE:FF:00:11:22:33:44:55:66:77:88:99:AA:BB:CC:DD:EE:FF:00:11:22:33:44:55:66:77:88:99\r\na=setup:active\r\na=mid:0\r\na=recvonly\r\na=rtcp-mux\r\na=rtcp-rsize\r\na=rtpmap:96 VP8/90000\r\n"
+
+@lru_cache(maxsize=None)
+def _encode_test_image(width: int, height: int) -> str:
+    """Encode the synthetic detection frame once per size"""
+    pixels = np.full((height, width, 3), (173, 216, 230), dtype=np.uint8)  # lightblue
+    # Red rectangle (simulating a person)
+    pixels[50:200, 80:180] = (255, 100, 100)
+    # Green square (simulating a car)
+    pixels[150:230, 200:280] = (100, 255, 100)
+    
+    # OpenCV expects BGR; quality 75 matches the PIL default used before
+    ok, jpeg = cv2.imencode('.jpg', cv2.cvtColor(pixels, cv2.COLOR_RGB2BGR), [cv2.IMWRITE_JPEG_QUALITY, 75])
+    if not ok:
+        raise RuntimeError("Failed to JPEG-encode test image")
+    image_data = base64.b64encode(jpeg.tobytes()).decode()
+    return f"data:image/jpeg;base64,{image_data}"
+
+# The detection test always uses the default frame, so encode it at import
+_TEST_IMAGE_DATA_URL = _encode_test_image(300, 300)
+
+def create_session() -> aiohttp.ClientSession:
+    """Session tuned for the signaling tests; share one across suites to reuse connections"""
+    # All tests hit one host concurrently; keep their connections pooled and alive
+    connector = aiohttp.TCPConnector(limit=0, limit_per_host=256, ttl_dns_cache=300, keepalive_timeout=75)
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=30),
+        json_serialize=dumps_text,
+        raise_for_status=True,
+        headers={"Content-Type": "application/json", "Accept": "application/json"}
+    )
+
 class WebRTCSignalingTester:
-    def __init__(self):
-        self.session = None
+    def __init__(self, session: Optional[aiohttp.ClientSession] = None):
+        # An injected session belongs to the caller and is left open on exit
+        self.session = session
+        self._owns_session = session is None
         self.test_room_id = "QH5AMV"  # Using the specific room from the request
+        # Client IDs already joined to the room, handed out by _checkout
+        self._client_pools = {"phone": [], "browser": []}
         
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        if self.session is None:
+            self.session = create_session()
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
+        if self.session and self._owns_session:
             await self.session.close()
     
     def create_test_image(self, width=300, height=300) -> str:
         """Create a test image for detection frame testing"""
-        image = Image.new('RGB', (width, height), color='lightblue')
-        
-        # Add some recognizable shapes for object detection
-        pixels = image.load()
-        # Red rectangle (simulating a person)
-        for i in range(80, 180):
-            for j in range(50, 200):
-                pixels[i, j] = (255, 100, 100)
-                
-        # Green square (simulating a car)
-        for i in range(200, 280):
-            for j in range(150, 230):
-                pixels[i, j] = (100, 255, 100)
-        
-        buffer = io.BytesIO()
-        image.save(buffer, format='JPEG')
-        image_data = base64.b64encode(buffer.getvalue()).decode()
-        return f"data:image/jpeg;base64,{image_data}"
+        if (width, height) == (300, 300):
+            return _TEST_IMAGE_DATA_URL
+        return _encode_test_image(width, height)
+    
+    async def _join(self, client_id: str) -> None:
+        """Join the test room as client_id"""
+        async with self.session.post(
+            f"{API_BASE}/signaling/{self.test_room_id}/join",
+            json={"client_id": client_id}
+        ):
+            pass
+    
+    async def _prejoin(self, phones: int, browsers: int) -> None:
+        """Join pooled phone/browser clients up front, all in one batch"""
+        pending = {
+            "phone": [f"phone_{token_hex(4)}" for _ in range(phones)],
+            "browser": [f"browser_{token_hex(4)}" for _ in range(browsers)]
+        }
+        await asyncio.gather(*(self._join(cid) for ids in pending.values() for cid in ids))
+        for kind, ids in pending.items():
+            self._client_pools[kind].extend(ids)
+    
+    async def _checkout(self, kind: str) -> str:
+        """Take a joined client of the given kind, joining a fresh one if the pool is empty"""
+        pool = self._client_pools[kind]
+        if pool:
+            return pool.pop()
+        client_id = f"{kind}_{token_hex(4)}"
+        await self._join(client_id)
+        return client_id
+    
+    async def _poll(self, client_id: str) -> List[dict]:
+        """Fetch and clear client_id's pending messages"""
+        async with self.session.get(
+            f"{API_BASE}/signaling/{self.test_room_id}/messages/{client_id}"
+        ) as response:
+            body = await response.read()
+            # Most polls come back empty; skip the parse for those
+            if body.startswith(_EMPTY_POLL_PREFIX):
+                return []
+            return _loads(body)['messages']
+    
+    async def _wait_for(self, client_id: str, msg_type: str, timeout: float = 1.0,
+                        match: Optional[Callable[[dict], bool]] = None) -> Optional[dict]:
+        """Poll client_id's queue with backoff until a msg_type message arrives; None on timeout"""
+        deadline = time.monotonic() + timeout
+        for delay in _poll_delays():
+            for message in await self._poll(client_id):
+                if message.get('type') == msg_type and (match is None or match(message)):
+                    return message
+            
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            await asyncio.sleep(min(delay, remaining))
+    
+    async def _send_and_wait(self, sender_id: str, target_id: str, msg_type: str, data: dict) -> Optional[dict]:
+        """Send a signaling message from sender_id to target_id and wait for it to arrive"""
+        async with self.session.post(
+            f"{API_BASE}/signaling/{self.test_room_id}/message",
+            json={"type": msg_type, "data": data, "target_id": target_id},
+            params={"client_id": sender_id}
+        ):
+            pass
+        return await self._wait_for(target_id, msg_type)
     
     async def test_http_signaling_join(self) -> bool:
         """Test HTTP signaling room join endpoint"""
         logger.info("Testing HTTP Signaling - Room Join...")
         try:
-            client_id = f"phone_client_{uuid.uuid4().hex[:8]}"
+            client_id = f"phone_client_{token_hex(4)}"
             
             join_request = {
                 "client_id": client_id
@@ -69,32 +171,28 @@ class WebRTCSignalingTester:
             
             async with self.session.post(
                 f"{API_BASE}/signaling/{self.test_room_id}/join",
-                json=join_request,
-                headers={"Content-Type": "application/json"}
+                json=join_request
             ) as response:
+                data = _loads(await response.read())
                 
-                if response.status == 200:
-                    data = await response.json()
-                    
-                    # Validate response structure
-                    required_fields = ["status", "room_id", "client_id", "users"]
-                    for field in required_fields:
-                        if field not in data:
-                            logger.error(f"✗ Missing field '{field}' in join response")
-                            return False
-                    
-                    logger.info(f"✓ HTTP Signaling Join successful")
-                    logger.info(f"  - Status: {data['status']}")
-                    logger.info(f"  - Room ID: {data['room_id']}")
-                    logger.info(f"  - Client ID: {data['client_id']}")
-                    logger.info(f"  - Users in room: {len(data['users'])}")
-                    
-                    return True
-                else:
-                    error_text = await response.text()
-                    logger.error(f"✗ HTTP Signaling Join failed: {response.status} - {error_text}")
+            # Validate response structure
+            required_fields = ["status", "room_id", "client_id", "users"]
+            for field in required_fields:
+                if field not in data:
+                    logger.error(f"✗ Missing field '{field}' in join response")
                     return False
+            
+            logger.info(f"✓ HTTP Signaling Join successful")
+            logger.info(f"  - Status: {data['status']}")
+            logger.info(f"  - Room ID: {data['room_id']}")
+            logger.info(f"  - Client ID: {data['client_id']}")
+            logger.info(f"  - Users in room: {len(data['users'])}")
+            
+            return True
                     
+        except aiohttp.ClientResponseError as e:
+            logger.error("✗ HTTP Signaling Join failed: %s %s %s", e.request_info.url, e.status, e.message)
+            return False
         except Exception as e:
             logger.error(f"✗ HTTP Signaling Join test failed: {e}")
             return False
@@ -103,46 +201,33 @@ class WebRTCSignalingTester:
         """Test HTTP signaling message polling endpoint"""
         logger.info("Testing HTTP Signaling - Message Polling...")
         try:
-            client_id = f"browser_client_{uuid.uuid4().hex[:8]}"
-            
-            # First join the room
-            join_request = {"client_id": client_id}
-            async with self.session.post(
-                f"{API_BASE}/signaling/{self.test_room_id}/join",
-                json=join_request,
-                headers={"Content-Type": "application/json"}
-            ) as response:
-                if response.status != 200:
-                    logger.error("Failed to join room for message polling test")
-                    return False
+            # Start from a client that has already joined the room
+            client_id = await self._checkout("browser")
             
             # Poll for messages
             async with self.session.get(
                 f"{API_BASE}/signaling/{self.test_room_id}/messages/{client_id}"
             ) as response:
+                data = _loads(await response.read())
                 
-                if response.status == 200:
-                    data = await response.json()
-                    
-                    # Validate response structure
-                    required_fields = ["messages", "client_id", "room_id", "count"]
-                    for field in required_fields:
-                        if field not in data:
-                            logger.error(f"✗ Missing field '{field}' in messages response")
-                            return False
-                    
-                    logger.info(f"✓ HTTP Signaling Message Polling successful")
-                    logger.info(f"  - Client ID: {data['client_id']}")
-                    logger.info(f"  - Room ID: {data['room_id']}")
-                    logger.info(f"  - Message count: {data['count']}")
-                    logger.info(f"  - Messages: {data['messages']}")
-                    
-                    return True
-                else:
-                    error_text = await response.text()
-                    logger.error(f"✗ HTTP Signaling Message Polling failed: {response.status} - {error_text}")
+            # Validate response structure
+            required_fields = ["messages", "client_id", "room_id", "count"]
+            for field in required_fields:
+                if field not in data:
+                    logger.error(f"✗ Missing field '{field}' in messages response")
                     return False
+            
+            logger.info(f"✓ HTTP Signaling Message Polling successful")
+            logger.info(f"  - Client ID: {data['client_id']}")
+            logger.info(f"  - Room ID: {data['room_id']}")
+            logger.info(f"  - Message count: {data['count']}")
+            logger.info(f"  - Messages: {data['messages']}")
+            
+            return True
                     
+        except aiohttp.ClientResponseError as e:
+            logger.error("✗ HTTP Signaling Message Polling failed: %s %s %s", e.request_info.url, e.status, e.message)
+            return False
         except Exception as e:
             logger.error(f"✗ HTTP Signaling Message Polling test failed: {e}")
             return False
@@ -151,131 +236,42 @@ class WebRTCSignalingTester:
         """Test complete WebRTC offer/answer signaling flow"""
         logger.info("Testing WebRTC Offer/Answer Flow...")
         try:
-            phone_client_id = f"phone_{uuid.uuid4().hex[:8]}"
-            browser_client_id = f"browser_{uuid.uuid4().hex[:8]}"
-            
             # Step 1: Both clients join the room
-            for client_id, client_type in [(phone_client_id, "phone"), (browser_client_id, "browser")]:
-                join_request = {"client_id": client_id}
-                async with self.session.post(
-                    f"{API_BASE}/signaling/{self.test_room_id}/join",
-                    json=join_request,
-                    headers={"Content-Type": "application/json"}
-                ) as response:
-                    if response.status != 200:
-                        logger.error(f"Failed to join room for {client_type}")
-                        return False
-                    logger.info(f"✓ {client_type} client joined room")
+            phone_client_id, browser_client_id = await asyncio.gather(
+                self._checkout("phone"), self._checkout("browser")
+            )
+            logger.info("✓ phone and browser clients joined room")
             
-            # Step 2: Phone sends SDP offer to browser
+            # Steps 2-3: Phone sends SDP offer, browser polls until it arrives
             sdp_offer = {
                 "type": "offer",
-                "sdp": "v=0\r\no=- 4611731400430051336 2 IN IP4 127.0.0.1\r\ns=-\r\nt=0 0\r\na=group:BUNDLE 0\r\na=extmap-allow-mixed\r\na=msid-semantic: WMS\r\nm=video 9 UDP/TLS/RTP/SAVPF 96 97 98 99 100 101 102 121 127 120 125 107 108 109 124 119 123 118 114 115 116\r\nc=IN IP4 0.0.0.0\r\na=rtcp:9 IN IP4 0.0.0.0\r\na=ice-ufrag:4ZcD\r\na=ice-pwd:2/1muCWoOi3uLifh4d2u6QgbvJRs\r\na=ice-options:trickle\r\na=fingerprint:sha-256 75:74:5A:A6:A4:E5:52:F4:A7:67:4C:01:C7:EE:91:3F:21:3D:A2:E3:53:7B:6F:30:86:F2:30:FF:A6:22:D2:04\r\na=setup:actpass\r\na=mid:0\r\na=extmap:1 urn:ietf:params:rtp-hdrext:toffset\r\na=extmap:2 http://www.webrtc.org/experiments/rtp-hdrext/abs-send-time\r\na=extmap:3 urn:3gpp:video-orientation\r\na=extmap:4 http://www.ietf.org/id/draft-holmer-rmcat-transport-wide-cc-extensions-01\r\na=extmap:5 http://www.webrtc.org/experiments/rtp-hdrext/playout-delay\r\na=extmap:6 http://www.webrtc.org/experiments/rtp-hdrext/video-content-type\r\na=extmap:7 http://www.webrtc.org/experiments/rtp-hdrext/video-timing\r\na=extmap:8 http://www.webrtc.org/experiments/rtp-hdrext/color-space\r\na=extmap:9 urn:ietf:params:rtp-hdrext:sdes:mid\r\na=extmap:10 urn:ietf:params:rtp-hdrext:sdes:rtp-stream-id\r\na=extmap:11 urn:ietf:params:rtp-hdrext:sdes:repaired-rtp-stream-id\r\na=sendrecv\r\na=msid:- {uuid.uuid4()}\r\na=rtcp-mux\r\na=rtcp-rsize\r\na=rtpmap:96 VP8/90000\r\na=rtcp-fb:96 goog-remb\r\na=rtcp-fb:96 transport-cc\r\na=rtcp-fb:96 ccm fir\r\na=rtcp-fb:96 nack\r\na=rtcp-fb:96 nack pli\r\na=ssrc:1001 cname:4TOk42mSjMCkjqMp\r\n"
+                "sdp": _SDP_OFFER_TMPL.format(msid=uuid.uuid4())
             }
+            message = await self._send_and_wait(phone_client_id, browser_client_id, 'offer', sdp_offer)
+            if message is None:
+                logger.error("✗ SDP offer not found in browser messages")
+                return False
+            logger.info("✓ SDP offer received by browser")
+            logger.info(f"  - Sender ID: {message.get('sender_id')}")
             
-            offer_message = {
-                "type": "offer",
-                "data": sdp_offer,
-                "target_id": browser_client_id
-            }
-            
-            async with self.session.post(
-                f"{API_BASE}/signaling/{self.test_room_id}/message",
-                json=offer_message,
-                params={"client_id": phone_client_id},
-                headers={"Content-Type": "application/json"}
-            ) as response:
-                if response.status == 200:
-                    logger.info("✓ SDP offer sent from phone to browser")
-                else:
-                    error_text = await response.text()
-                    logger.error(f"✗ Failed to send SDP offer: {response.status} - {error_text}")
-                    return False
-            
-            # Step 3: Browser polls for messages and should receive the offer
-            await asyncio.sleep(0.5)  # Small delay to ensure message is queued
-            
-            async with self.session.get(
-                f"{API_BASE}/signaling/{self.test_room_id}/messages/{browser_client_id}"
-            ) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    
-                    if data['count'] > 0:
-                        offer_received = False
-                        for message in data['messages']:
-                            if message.get('type') == 'offer':
-                                offer_received = True
-                                logger.info("✓ SDP offer received by browser")
-                                logger.info(f"  - Sender ID: {message.get('sender_id')}")
-                                break
-                        
-                        if not offer_received:
-                            logger.error("✗ SDP offer not found in browser messages")
-                            return False
-                    else:
-                        logger.error("✗ No messages received by browser")
-                        return False
-                else:
-                    logger.error("✗ Failed to poll messages for browser")
-                    return False
-            
-            # Step 4: Browser sends SDP answer back to phone
+            # Steps 4-5: Browser sends SDP answer back, phone polls until it arrives
             sdp_answer = {
                 "type": "answer",
-                "sdp": "v=0\r\no=- 1234567890123456789 2 IN IP4 127.0.0.1\r\ns=-\r\nt=0 0\r\na=group:BUNDLE 0\r\na=extmap-allow-mixed\r\na=msid-semantic: WMS\r\nm=video 9 UDP/TLS/RTP/SAVPF 96\r\nc=IN IP4 0.0.0.0\r\na=rtcp:9 IN IP4 0.0.0.0\r\na=ice-ufrag:abcd\r\na=ice-pwd:1234567890123456789012\r\na=ice-options:trickle\r\na=fingerprint:sha-256 AA:BB:CC:DD:EE:FF:00:11:22:33:44:55:66:77:88:99:AA:BB:CC:DD:EE:FF:00:11:22:33:44:55:66:77:88:99\r\na=setup:active\r\na=mid:0\r\na=recvonly\r\na=rtcp-mux\r\na=rtcp-rsize\r\na=rtpmap:96 VP8/90000\r\n"
+                "sdp": _SDP_ANSWER
             }
-            
-            answer_message = {
-                "type": "answer",
-                "data": sdp_answer,
-                "target_id": phone_client_id
-            }
-            
-            async with self.session.post(
-                f"{API_BASE}/signaling/{self.test_room_id}/message",
-                json=answer_message,
-                params={"client_id": browser_client_id},
-                headers={"Content-Type": "application/json"}
-            ) as response:
-                if response.status == 200:
-                    logger.info("✓ SDP answer sent from browser to phone")
-                else:
-                    error_text = await response.text()
-                    logger.error(f"✗ Failed to send SDP answer: {response.status} - {error_text}")
-                    return False
-            
-            # Step 5: Phone polls for messages and should receive the answer
-            await asyncio.sleep(0.5)
-            
-            async with self.session.get(
-                f"{API_BASE}/signaling/{self.test_room_id}/messages/{phone_client_id}"
-            ) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    
-                    if data['count'] > 0:
-                        answer_received = False
-                        for message in data['messages']:
-                            if message.get('type') == 'answer':
-                                answer_received = True
-                                logger.info("✓ SDP answer received by phone")
-                                logger.info(f"  - Sender ID: {message.get('sender_id')}")
-                                break
-                        
-                        if not answer_received:
-                            logger.error("✗ SDP answer not found in phone messages")
-                            return False
-                    else:
-                        logger.error("✗ No messages received by phone")
-                        return False
-                else:
-                    logger.error("✗ Failed to poll messages for phone")
-                    return False
+            message = await self._send_and_wait(browser_client_id, phone_client_id, 'answer', sdp_answer)
+            if message is None:
+                logger.error("✗ SDP answer not found in phone messages")
+                return False
+            logger.info("✓ SDP answer received by phone")
+            logger.info(f"  - Sender ID: {message.get('sender_id')}")
             
             logger.info("✓ Complete WebRTC Offer/Answer flow successful")
             return True
             
+        except aiohttp.ClientResponseError as e:
+            logger.error("✗ WebRTC Offer/Answer flow failed: %s %s %s", e.request_info.url, e.status, e.message)
+            return False
         except Exception as e:
             logger.error(f"✗ WebRTC Offer/Answer flow test failed: {e}")
             return False
@@ -284,20 +280,10 @@ class WebRTCSignalingTester:
         """Test ICE candidate exchange"""
         logger.info("Testing ICE Candidate Exchange...")
         try:
-            phone_client_id = f"phone_{uuid.uuid4().hex[:8]}"
-            browser_client_id = f"browser_{uuid.uuid4().hex[:8]}"
-            
             # Join room
-            for client_id in [phone_client_id, browser_client_id]:
-                join_request = {"client_id": client_id}
-                async with self.session.post(
-                    f"{API_BASE}/signaling/{self.test_room_id}/join",
-                    json=join_request,
-                    headers={"Content-Type": "application/json"}
-                ) as response:
-                    if response.status != 200:
-                        logger.error(f"Failed to join room for ICE test")
-                        return False
+            phone_client_id, browser_client_id = await asyncio.gather(
+                self._checkout("phone"), self._checkout("browser")
+            )
             
             # Phone sends ICE candidate to browser
             ice_candidate = {
@@ -305,49 +291,12 @@ class WebRTCSignalingTester:
                 "sdpMLineIndex": 0,
                 "sdpMid": "0"
             }
-            
-            ice_message = {
-                "type": "ice_candidate",
-                "data": ice_candidate,
-                "target_id": browser_client_id
-            }
-            
-            async with self.session.post(
-                f"{API_BASE}/signaling/{self.test_room_id}/message",
-                json=ice_message,
-                params={"client_id": phone_client_id},
-                headers={"Content-Type": "application/json"}
-            ) as response:
-                if response.status == 200:
-                    logger.info("✓ ICE candidate sent from phone to browser")
-                else:
-                    error_text = await response.text()
-                    logger.error(f"✗ Failed to send ICE candidate: {response.status} - {error_text}")
-                    return False
-            
-            # Browser polls and receives ICE candidate
-            await asyncio.sleep(0.5)
-            
-            async with self.session.get(
-                f"{API_BASE}/signaling/{self.test_room_id}/messages/{browser_client_id}"
-            ) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    
-                    ice_received = False
-                    for message in data['messages']:
-                        if message.get('type') == 'ice_candidate':
-                            ice_received = True
-                            logger.info("✓ ICE candidate received by browser")
-                            logger.info(f"  - Candidate: {message['data']['candidate'][:50]}...")
-                            break
-                    
-                    if not ice_received:
-                        logger.error("✗ ICE candidate not received by browser")
-                        return False
-                else:
-                    logger.error("✗ Failed to poll ICE candidate")
-                    return False
+            message = await self._send_and_wait(phone_client_id, browser_client_id, 'ice_candidate', ice_candidate)
+            if message is None:
+                logger.error("✗ ICE candidate not received by browser")
+                return False
+            logger.info("✓ ICE candidate received by browser")
+            logger.info(f"  - Candidate: {message['data']['candidate'][:50]}...")
             
             # Browser sends ICE candidate back to phone
             browser_ice_candidate = {
@@ -355,52 +304,17 @@ class WebRTCSignalingTester:
                 "sdpMLineIndex": 0,
                 "sdpMid": "0"
             }
-            
-            browser_ice_message = {
-                "type": "ice_candidate",
-                "data": browser_ice_candidate,
-                "target_id": phone_client_id
-            }
-            
-            async with self.session.post(
-                f"{API_BASE}/signaling/{self.test_room_id}/message",
-                json=browser_ice_message,
-                params={"client_id": browser_client_id},
-                headers={"Content-Type": "application/json"}
-            ) as response:
-                if response.status == 200:
-                    logger.info("✓ ICE candidate sent from browser to phone")
-                else:
-                    error_text = await response.text()
-                    logger.error(f"✗ Failed to send browser ICE candidate: {response.status} - {error_text}")
-                    return False
-            
-            # Phone receives ICE candidate
-            await asyncio.sleep(0.5)
-            
-            async with self.session.get(
-                f"{API_BASE}/signaling/{self.test_room_id}/messages/{phone_client_id}"
-            ) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    
-                    ice_received = False
-                    for message in data['messages']:
-                        if message.get('type') == 'ice_candidate':
-                            ice_received = True
-                            logger.info("✓ ICE candidate received by phone")
-                            break
-                    
-                    if not ice_received:
-                        logger.error("✗ ICE candidate not received by phone")
-                        return False
-                else:
-                    logger.error("✗ Failed to poll ICE candidate for phone")
-                    return False
+            if await self._send_and_wait(browser_client_id, phone_client_id, 'ice_candidate', browser_ice_candidate) is None:
+                logger.error("✗ ICE candidate not received by phone")
+                return False
+            logger.info("✓ ICE candidate received by phone")
             
             logger.info("✓ Bidirectional ICE candidate exchange successful")
             return True
             
+        except aiohttp.ClientResponseError as e:
+            logger.error("✗ ICE candidate exchange failed: %s %s %s", e.request_info.url, e.status, e.message)
+            return False
         except Exception as e:
             logger.error(f"✗ ICE candidate exchange test failed: {e}")
             return False
@@ -419,32 +333,28 @@ class WebRTCSignalingTester:
                 "max_detections": 10
             }
             
-            start_time = time.time()
             async with self.session.post(
                 f"{API_BASE}/detect",
-                json=detection_request,
-                headers={"Content-Type": "application/json"}
+                json=detection_request
             ) as response:
-                end_time = time.time()
+                data = _loads(await response.read())
                 
-                if response.status == 200:
-                    data = await response.json()
-                    processing_time = (end_time - start_time) * 1000
-                    
-                    logger.info("✓ Object Detection API working")
-                    logger.info(f"  - Processing time: {processing_time:.2f}ms")
-                    logger.info(f"  - Detections found: {len(data['detections'])}")
-                    
-                    # Log detection details
-                    for i, det in enumerate(data['detections'][:3]):
-                        logger.info(f"  - Detection {i+1}: {det['class_name']} ({det['confidence']:.2f})")
-                    
-                    return True
-                else:
-                    error_text = await response.text()
-                    logger.error(f"✗ Object Detection API failed: {response.status} - {error_text}")
-                    return False
+            # Server-side timestamps, so network round-trip is excluded
+            processing_time = (data['inference_ts'] - data['recv_ts']) * 1000
+            
+            logger.info("✓ Object Detection API working")
+            logger.info(f"  - Processing time: {processing_time:.2f}ms")
+            logger.info(f"  - Detections found: {len(data['detections'])}")
+            
+            # Log detection details
+            for i, det in enumerate(data['detections'][:3]):
+                logger.info(f"  - Detection {i+1}: {det['class_name']} ({det['confidence']:.2f})")
+            
+            return True
                     
+        except aiohttp.ClientResponseError as e:
+            logger.error("✗ Object Detection API failed: %s %s %s", e.request_info.url, e.status, e.message)
+            return False
         except Exception as e:
             logger.error(f"✗ Object Detection integration test failed: {e}")
             return False
@@ -454,19 +364,10 @@ class WebRTCSignalingTester:
         logger.info("Testing Room Management Performance...")
         try:
             # Create multiple clients
-            client_ids = [f"client_{i}_{uuid.uuid4().hex[:6]}" for i in range(5)]
+            client_ids = [f"client_{i}_{token_hex(3)}" for i in range(5)]
             
-            # All clients join the room
-            for client_id in client_ids:
-                join_request = {"client_id": client_id}
-                async with self.session.post(
-                    f"{API_BASE}/signaling/{self.test_room_id}/join",
-                    json=join_request,
-                    headers={"Content-Type": "application/json"}
-                ) as response:
-                    if response.status != 200:
-                        logger.error(f"Failed to join room for client {client_id}")
-                        return False
+            # All clients join the room at once
+            await asyncio.gather(*(self._join(client_id) for client_id in client_ids))
             
             logger.info(f"✓ {len(client_ids)} clients joined room")
             
@@ -474,24 +375,23 @@ class WebRTCSignalingTester:
             async with self.session.get(
                 f"{API_BASE}/signaling/{self.test_room_id}/users"
             ) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    logger.info(f"✓ Room users retrieved via HTTP signaling")
-                    logger.info(f"  - Room ID: {data['room_id']}")
-                    logger.info(f"  - User count: {data['count']}")
-                    logger.info(f"  - Users: {data['users'][:3]}...")  # Show first 3
-                    
-                    if data['count'] >= len(client_ids):
-                        logger.info("✓ All clients properly tracked in room")
-                        return True
-                    else:
-                        logger.error(f"✗ Expected {len(client_ids)} users, found {data['count']}")
-                        return False
-                else:
-                    error_text = await response.text()
-                    logger.error(f"✗ Failed to get room users: {response.status} - {error_text}")
-                    return False
+                data = _loads(await response.read())
+                
+            logger.info(f"✓ Room users retrieved via HTTP signaling")
+            logger.info(f"  - Room ID: {data['room_id']}")
+            logger.info(f"  - User count: {data['count']}")
+            logger.info(f"  - Users: {data['users'][:3]}...")  # Show first 3
+            
+            if data['count'] >= len(client_ids):
+                logger.info("✓ All clients properly tracked in room")
+                return True
+            else:
+                logger.error(f"✗ Expected {len(client_ids)} users, found {data['count']}")
+                return False
                     
+        except aiohttp.ClientResponseError as e:
+            logger.error("✗ Room management failed: %s %s %s", e.request_info.url, e.status, e.message)
+            return False
         except Exception as e:
             logger.error(f"✗ Room management performance test failed: {e}")
             return False
@@ -500,62 +400,52 @@ class WebRTCSignalingTester:
         """Test signaling message delivery latency"""
         logger.info("Testing Message Delivery Latency...")
         try:
-            sender_id = f"sender_{uuid.uuid4().hex[:8]}"
-            receiver_id = f"receiver_{uuid.uuid4().hex[:8]}"
-            
             # Both join room
-            for client_id in [sender_id, receiver_id]:
-                join_request = {"client_id": client_id}
-                async with self.session.post(
-                    f"{API_BASE}/signaling/{self.test_room_id}/join",
-                    json=join_request,
-                    headers={"Content-Type": "application/json"}
-                ) as response:
-                    if response.status != 200:
-                        logger.error(f"Failed to join room for latency test")
-                        return False
+            sender_id, receiver_id = await asyncio.gather(
+                self._checkout("phone"), self._checkout("browser")
+            )
             
-            # Send multiple messages and measure latency
+            # Send all messages at once, then collect them as they arrive
             num_messages = 5
-            latencies = []
+            send_times = {}
             
-            for i in range(num_messages):
-                # Send message with timestamp
-                send_time = time.time()
+            async def send(i: int) -> bool:
+                send_times[i] = time.time()
                 test_message = {
                     "type": "test_message",
-                    "data": {"message_id": i, "send_time": send_time},
+                    "data": {"message_id": i, "send_time": send_times[i]},
                     "target_id": receiver_id
                 }
-                
                 async with self.session.post(
                     f"{API_BASE}/signaling/{self.test_room_id}/message",
                     json=test_message,
                     params={"client_id": sender_id},
-                    headers={"Content-Type": "application/json"}
+                    raise_for_status=False  # A failed send only drops that message
                 ) as response:
                     if response.status != 200:
                         logger.error(f"Failed to send test message {i}")
-                        continue
-                
-                # Small delay between messages
-                await asyncio.sleep(0.1)
+                        return False
+                    return True
+            
+            sent = await asyncio.gather(*(send(i) for i in range(num_messages)))
+            pending = {i for i, ok in enumerate(sent) if ok}
+            latencies = []
+            
+            # One poll drains every queued message; match them up by message_id
+            deadline = time.monotonic() + 1.0
+            for delay in _poll_delays():
+                messages = await self._poll(receiver_id)
+                recv_time = time.time()
+                for message in messages:
+                    message_id = message.get('data', {}).get('message_id')
+                    if message.get('type') == 'test_message' and message_id in pending:
+                        pending.discard(message_id)
+                        latencies.append((recv_time - send_times[message_id]) * 1000)
                 
-                # Poll for message
-                async with self.session.get(
-                    f"{API_BASE}/signaling/{self.test_room_id}/messages/{receiver_id}"
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        recv_time = time.time()
-                        
-                        # Find our message
-                        for message in data['messages']:
-                            if (message.get('type') == 'test_message' and 
-                                message.get('data', {}).get('message_id') == i):
-                                latency = (recv_time - send_time) * 1000
-                                latencies.append(latency)
-                                break
+                remaining = deadline - time.monotonic()
+                if not pending or remaining <= 0:
+                    break
+                await asyncio.sleep(min(delay, remaining))
             
             if latencies:
                 avg_latency = sum(latencies) / len(latencies)
@@ -574,6 +464,9 @@ class WebRTCSignalingTester:
                 logger.error("✗ No latency measurements collected")
                 return False
                 
+        except aiohttp.ClientResponseError as e:
+            logger.error("✗ Message delivery latency failed: %s %s %s", e.request_info.url, e.status, e.message)
+            return False
         except Exception as e:
             logger.error(f"✗ Message delivery latency test failed: {e}")
             return False
@@ -598,16 +491,29 @@ class WebRTCSignalingTester:
         
         results = {}
         
+        # Join every client the messaging tests need in one round-trip; the join
+        # and room management tests still join their own, since that is what they test
+        try:
+            await self._prejoin(phones=3, browsers=4)
+        except aiohttp.ClientError as e:
+            logger.warning(f"Pre-joining test clients failed, tests will join on demand: {e}")
+        
+        # Every test uses its own client IDs, so they can all run at once
+        tasks = []
         for test_name, test_func in tests:
             logger.info(f"\n{'='*25} {test_name} {'='*25}")
-            try:
-                result = await test_func()
-                results[test_name] = result
-                status = "✓ PASSED" if result else "✗ FAILED"
-                logger.info(f"{test_name}: {status}")
-            except Exception as e:
-                logger.error(f"{test_name}: ✗ FAILED with exception: {e}")
+            tasks.append(asyncio.create_task(test_func(), name=test_name))
+        
+        gathered = await asyncio.gather(*tasks, return_exceptions=True)
+        
+        for (test_name, _), result in zip(tests, gathered):
+            if isinstance(result, BaseException):
+                logger.error(f"{test_name}: ✗ FAILED with exception: {result}")
                 results[test_name] = False
+                continue
+            results[test_name] = result
+            status = "✓ PASSED" if result else "✗ FAILED"
+            logger.info(f"{test_name}: {status}")
         
         # Summary
         logger.info("\n" + "=" * 80)
@@ -648,9 +554,8 @@ async def main():
         logger.info(f"- All tests passed: {all_passed}")
         logger.info(f"- Critical signaling tests passed: {critical_passed}/4")
         
-        return results
+        return all_passed, results
 
 if __name__ == "__main__":
-    results = asyncio.run(main())
-    all_passed = all(results.values())
+    all_passed, _ = asyncio.run(main())
     exit(0 if all_passed else 1)
\ No newline at end of file